@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +50,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'myapp.middleware.ReplicaStickinessMiddleware',
+    'myapp.middleware.SamplingProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'home.urls'
@@ -81,9 +84,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read replica for read-only endpoints. Defaults to the primary's file so a
+    # single-node setup works unchanged; point it at a replicated copy to offload reads.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DATABASE_REPLICA_NAME', BASE_DIR / 'db.sqlite3'),
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+# Location shards: each name in LOCATION_SHARDS gets its own database holding the
+# rooms and bookings of the locations assigned to it (see myapp.models.Location).
+LOCATION_SHARDS = [name for name in os.environ.get('LOCATION_SHARDS', '').split(',') if name]
+for shard in LOCATION_SHARDS:
+    DATABASES[shard] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{shard}.sqlite3',
+    }
+
+# Databases that hold rooms and bookings; 'default' serves rooms without a location
+SHARD_DATABASES = ['default', *LOCATION_SHARDS]
+
+DATABASE_ROUTERS = ['myapp.routers.ShardedReplicaRouter']
+
+# Reads stay on the primary for this many seconds after a user's write (read-your-writes),
+# using a signed cookie set on the write's response
+REPLICA_STICKY_SECONDS = 5
+
+# Team membership and the timeslot catalog are cached only in a cache shared by every
+# worker process and host and served outside the database, since they are invalidated
+# in one worker and must be seen by all. Set REDIS_URL (needs the redis package) to
+# enable it; otherwise they are read from the database and the default per-process
+# cache holds only short-lived data.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,4 +183,65 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=300),  
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),     
-}
\ No newline at end of file
+}
+
+# Responses to booking writes sent with an Idempotency-Key header are replayed for this long
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# In-process admission control for booking writes (see myapp/throttling.py)
+BOOKING_ADMISSION = {
+    'RATE': 1.0,
+    'BURST': 5,
+    'MAX_CONCURRENT_WRITES': 4,
+    'ACQUIRE_TIMEOUT': 0.05,
+    'RETRY_AFTER': 1,
+    'MAX_TRACKED_USERS': 10000,
+}
+
+# Free-form booking intervals must start and end on multiples of this many minutes
+BOOKING_GRANULARITY_MINUTES = 15
+
+# Seconds a user's team-id set is cached for visibility queries when REDIS_URL is set
+# (invalidated on membership change)
+TEAM_IDS_CACHE_TTL = 300
+
+# Seconds the timeslot catalog is cached for when REDIS_URL is set (invalidated whenever a
+# timeslot changes)
+TIMESLOT_CATALOG_CACHE_TTL = 3600
+
+# Booking audit log, written in batches by a background thread (see myapp/audit.py)
+AUDIT_LOG = {
+    'ASYNC': True,
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'ENQUEUE_TIMEOUT': 0.05,
+    'MAX_RETRIES': 3,
+    'SHUTDOWN_TIMEOUT': 5,
+}
+
+# Opt-in request profiling (see myapp/profiling.py); 0.0 samples nothing, admins can still send X-Profile
+PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0')),
+    'HEADER': 'X-Profile',
+    'DIRECTORY': os.environ.get('PROFILING_DIRECTORY') or BASE_DIR / 'profiles',
+    'MAX_PROFILES': 200,
+    'TRACEMALLOC': True,
+    'TOP_ALLOCATIONS': 25,
+}
+
+# Per-host shared memory occupancy table used by availability reads (see myapp/occupancy_shm.py)
+OCCUPANCY_SHM = {
+    'ENABLED': True,
+    'DIRECTORY': os.environ.get('OCCUPANCY_SHM_DIRECTORY'),
+    'MAX_ROOMS': 4096,
+    'DAYS': 120,
+    'MAX_AGE': 60,
+}
+
+# Retired rooms, timeslots, teams and users are deleted later by purge_retired (see myapp/retirement.py)
+RETIREMENT = {
+    'PURGE_AFTER': 0,
+    'BATCH_SIZE': 1000,
+    'PAUSE': 0.05,
+}
@@ -1,10 +1,184 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, router, transaction
+from django.utils.functional import cached_property
 
-from .models import User, Team, Room, Booking, Timeslot
+from .audit import record_event
+from .occupancy import rebuild_room_days
+from .retirement import cancel_retired_bookings
+from .models import User, Team, Room, Booking, Timeslot, Location, WaitlistEntry, AuditEvent
 
 
-admin.site.register(User)
-admin.site.register(Team)
-admin.site.register(Room)
-admin.site.register(Booking)
-admin.site.register(Timeslot)
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator that avoids exact COUNT(*) on large tables.
+
+    Unfiltered changelists use the database's row estimate. Filtered ones are
+    counted exactly, as a capped count would leave the pages past the cap
+    unreachable; filters and searches are expected to narrow the table through
+    an index.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = self.estimate_rows(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by().count()
+
+    def estimate_rows(self, queryset):
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            elif connection.vendor == 'sqlite':
+                # The largest rowid is read from the end of the b-tree without scanning
+                cursor.execute(f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}')
+            else:
+                return None
+            row = cursor.fetchone()
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base ModelAdmin for tables too large for exact counts.
+    """
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class RetireActionMixin:
+    """
+    Replaces deletion of rooms, timeslots, teams and users with a "Retire selected" action.
+
+    Deleting one of these here would cascade through all of its bookings in one
+    transaction, so the delete button and the stock "Delete selected" action are
+    withheld; retiring hides the row at once and leaves the deletion to the
+    purge_retired command. Upcoming bookings of retired users and teams are cancelled
+    right away.
+    """
+    actions = ['retire_selected']
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description='Retire selected %(verbose_name_plural)s')
+    def retire_selected(self, request, queryset):
+        retired = 0
+        for obj in queryset.filter(retired_at__isnull=True):
+            obj.retire()
+            cancel_retired_bookings(obj)
+            retired += 1
+        self.message_user(request, f'Retired {retired} {queryset.model._meta.verbose_name_plural}.')
+
+
+@admin.register(User)
+class UserAdmin(RetireActionMixin, LargeTableAdmin):
+    list_display = ('name', 'email', 'role', 'is_active', 'is_staff', 'retired_at')
+    list_filter = ('role', 'is_active', ('retired_at', admin.EmptyFieldListFilter))
+    search_fields = ('^name', '^email')
+    readonly_fields = ('password', 'last_login')
+    ordering = ('name',)
+
+
+@admin.register(Team)
+class TeamAdmin(RetireActionMixin, LargeTableAdmin):
+    list_display = ('name', 'created_by', 'retired_at')
+    list_select_related = ('created_by',)
+    list_filter = (('retired_at', admin.EmptyFieldListFilter),)
+    search_fields = ('^name',)
+    autocomplete_fields = ('created_by', 'members')
+    ordering = ('name',)
+
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'database')
+    search_fields = ('^name', '^code')
+
+
+@admin.register(Room)
+class RoomAdmin(RetireActionMixin, admin.ModelAdmin):
+    list_display = ('name', 'room_type', 'capacity', 'location', 'retired_at')
+    list_select_related = ('location',)
+    list_filter = ('room_type', ('retired_at', admin.EmptyFieldListFilter))
+    search_fields = ('^name',)
+    autocomplete_fields = ('location',)
+    ordering = ('name',)
+
+
+@admin.register(Timeslot)
+class TimeslotAdmin(RetireActionMixin, admin.ModelAdmin):
+    list_display = ('name', 'start_time', 'end_time', 'retired_at')
+    list_filter = (('retired_at', admin.EmptyFieldListFilter),)
+    ordering = ('start_time',)
+
+
+@admin.register(Booking)
+class BookingAdmin(LargeTableAdmin):
+    list_display = ('id', 'date', 'start_time', 'end_time', 'room', 'user', 'team', 'is_active')
+    # Booking.__str__ (rendered per row, e.g. in the action checkbox label) dereferences these
+    list_select_related = ('room', 'user', 'team', 'time_slot')
+    list_filter = ('is_active', 'date', 'room')
+    autocomplete_fields = ('room', 'user', 'team')
+    raw_id_fields = ('time_slot',)
+    readonly_fields = ('timestamp',)
+    ordering = ('-date', '-start_time')
+
+    # Edits and deletes bypass the booking views, so occupancy of every room-day the
+    # booking was or is on is recomputed in the same transaction
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic(using=router.db_for_write(Booking)):
+            before = Booking.objects.filter(pk=obj.pk).values_list('room_id', 'date').first() if change else None
+            super().save_model(request, obj, form, change)
+            rebuild_room_days({key for key in (before, (obj.room_id, obj.date)) if key})
+            record_event('booking_admin_changed', obj, actor=request.user, added=not change, changed_fields=form.changed_data)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic(using=router.db_for_write(Booking)):
+            record_event('booking_admin_deleted', obj, actor=request.user)
+            super().delete_model(request, obj)
+            rebuild_room_days({(obj.room_id, obj.date)})
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(using=router.db_for_write(Booking)):
+            bookings = list(queryset.select_related('room'))
+            for booking in bookings:
+                record_event('booking_admin_deleted', booking, actor=request.user)
+            super().delete_queryset(request, queryset)
+            rebuild_room_days({(booking.room_id, booking.date) for booking in bookings})
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(LargeTableAdmin):
+    list_display = ('id', 'date', 'time_slot', 'room', 'room_type', 'user', 'team', 'created_at')
+    list_select_related = ('room', 'time_slot', 'user', 'team')
+    list_filter = ('room_type', 'date')
+    autocomplete_fields = ('room', 'user', 'team')
+    raw_id_fields = ('time_slot', 'location')
+    readonly_fields = ('created_at',)
+    ordering = ('date', 'id')
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(LargeTableAdmin):
+    list_display = ('id', 'created_at', 'action', 'booking_id', 'room_id', 'user_id', 'team_id', 'actor_id')
+    list_filter = ('action',)
+    search_fields = ('=booking_id',)
+    ordering = ('-created_at', '-id')
+
+    # The history is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
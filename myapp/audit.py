@@ -0,0 +1,182 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import AuditEvent
+from .routers import current_shard
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIT_LOG = {
+    'ASYNC': True,                # write from a background thread; False writes in the request after commit
+    'QUEUE_SIZE': 10000,          # events buffered in memory per process
+    'BATCH_SIZE': 500,            # events per bulk_create
+    'FLUSH_INTERVAL': 1.0,        # seconds the writer sleeps waiting for events
+    'ENQUEUE_TIMEOUT': 0.05,      # seconds a request waits for queue space before writing inline
+    'MAX_RETRIES': 3,             # attempts per batch before the events are logged and dropped
+    'SHUTDOWN_TIMEOUT': 5,        # seconds to drain the queue at interpreter exit
+}
+
+
+def audit_setting(name):
+    """
+    Read a single audit log option from settings.AUDIT_LOG.
+    """
+    return getattr(settings, 'AUDIT_LOG', {}).get(name, DEFAULT_AUDIT_LOG[name])
+
+
+class AuditLogWriter:
+    """
+    Bounded in-process queue of audit events, drained in batches by a background thread.
+
+    Events are never dropped for lack of space: when the queue stays full for
+    ENQUEUE_TIMEOUT the producer writes its event itself, which slows that request
+    down (backpressure) instead of losing history.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._counts = {'enqueued': 0, 'written': 0, 'written_inline': 0, 'failed': 0}
+
+    def _incr(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        counts['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return counts
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # First use, or first use in a forked worker: threads do not survive fork
+            self._queue = queue.Queue(maxsize=audit_setting('QUEUE_SIZE'))
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, event):
+        """
+        Hand an event to the background writer, or write it inline when the writer
+        is disabled, stopped or saturated.
+        """
+        if not audit_setting('ASYNC') or self._stopping.is_set():
+            self._write([event], counter='written_inline')
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(event, timeout=audit_setting('ENQUEUE_TIMEOUT'))
+        except queue.Full:
+            self._write([event], counter='written_inline')
+            return
+        self._incr('enqueued')
+
+    def flush(self):
+        """
+        Block until every event queued so far has been written.
+        """
+        if self._queue is not None and self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def shutdown(self):
+        """
+        Stop the writer after draining the queue, waiting at most SHUTDOWN_TIMEOUT seconds.
+        """
+        self._stopping.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(audit_setting('SHUTDOWN_TIMEOUT'))
+
+    def _run(self):
+        events = self._queue
+        try:
+            while not (self._stopping.is_set() and events.empty()):
+                try:
+                    batch = [events.get(timeout=audit_setting('FLUSH_INTERVAL'))]
+                except queue.Empty:
+                    continue
+                batch_size = audit_setting('BATCH_SIZE')
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(events.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._write(batch)
+                finally:
+                    for _ in batch:
+                        events.task_done()
+        finally:
+            connections.close_all()
+
+    def _write(self, batch, counter='written'):
+        for attempt in range(1, audit_setting('MAX_RETRIES') + 1):
+            close_old_connections()
+            try:
+                AuditEvent.objects.bulk_create(batch)
+            except DatabaseError:
+                logger.exception('Writing %d audit events failed (attempt %d).', len(batch), attempt)
+                time.sleep(0.1 * attempt)
+            else:
+                self._incr(counter, len(batch))
+                return
+        self._incr('failed', len(batch))
+        for event in batch:
+            logger.error(
+                'Dropped audit event %s booking=%s actor=%s at %s: %s',
+                event.action, event.booking_id, event.actor_id, event.created_at, event.data,
+            )
+
+
+audit_log = AuditLogWriter()
+atexit.register(audit_log.shutdown)
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def record_event(action, booking, actor=None, **data):
+    """
+    Record a booking change once the surrounding transaction commits.
+
+    Nothing is written inside the transaction; the event is handed to the background
+    writer from an on_commit hook, so rolled back changes leave no trace.
+
+    Args:
+        action: One of AuditEvent.ACTIONS.
+        booking: The booking that changed, in its state after the change.
+        actor: User who made the change, or None for system actions.
+        **data: Extra JSON-serializable details to store with the event.
+    """
+    event = AuditEvent(
+        action=action,
+        booking_id=booking.pk,
+        room_id=booking.room_id,
+        location_id=booking.room.location_id,
+        user_id=booking.user_id,
+        team_id=booking.team_id,
+        actor_id=actor.pk if actor is not None else None,
+        data={
+            'date': _iso(booking.date),
+            'start_time': _iso(booking.start_time),
+            'end_time': _iso(booking.end_time),
+            'time_slot_id': str(booking.time_slot_id) if booking.time_slot_id else None,
+            'is_active': booking.is_active,
+            **data,
+        },
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: audit_log.enqueue(event), using=current_shard())
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.cache import cache
+
+# Cache backends shared by every worker and host that are served outside the database
+SHARED_CACHE_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+
+def shared_cache():
+    """
+    Return the default cache if it is shared by all workers and lives outside the
+    database (Redis or Memcached), else None.
+
+    Data invalidated by one worker, such as team memberships, may only be cached where
+    every worker sees the invalidation. A database cache would cost a query per lookup,
+    as much as the data it stands for, so callers read the database directly instead.
+    """
+    if settings.CACHES.get('default', {}).get('BACKEND') in SHARED_CACHE_BACKENDS:
+        return cache
+    return None
@@ -0,0 +1,214 @@
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import json
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+# Booking dates and times are wall-clock times in settings.TIME_ZONE
+PRODID = '-//Room Booking//Bookings//EN'
+UID_DOMAIN = 'room-booking'
+
+
+class ICalendarRenderer(BaseRenderer):
+    """
+    Lets calendar clients negotiate text/calendar. Calendars are streamed by the view
+    itself and error responses are switched to JSONRenderer by the view, so this
+    renderer only encodes data that reaches it anyway as JSON.
+    """
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
+
+
+def escape_text(value):
+    """
+    Escape a TEXT property value (RFC 5545 3.3.11).
+    """
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def unescape_text(value):
+    result, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            char = next(chars, '')
+            result.append('\n' if char in 'nN' else char)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def param_value(value):
+    """
+    Quote a property parameter value (RFC 5545 3.2). Characters a quoted-string cannot
+    hold are caret-encoded (RFC 6868); other control characters are dropped.
+    """
+    value = str(value).replace('^', '^^').replace('"', "^'").replace('\r\n', '\n').replace('\n', '^n')
+    return '"' + ''.join(char for char in value if char == '\t' or (' ' <= char and char != '\x7f')) + '"'
+
+
+def fold(line):
+    """
+    Fold a content line to at most 75 octets per physical line, ending with CRLF.
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _format_datetime(day, time):
+    value = datetime.combine(day, time).strftime('%Y%m%dT%H%M%S')
+    if settings.TIME_ZONE == 'UTC':
+        return f':{value}Z'
+    return f';TZID={settings.TIME_ZONE}:{value}'
+
+
+def booking_event(booking, room_name, team_name=None, organizer=None):
+    """
+    Render one booking as a VEVENT.
+
+    Args:
+        booking: Booking instance (or anything with id, date, start_time, end_time, timestamp, team_id).
+        room_name: Name of the booked room, used as LOCATION.
+        team_name: Name of the booking team, if any.
+        organizer: (name, email) of the booking user, if any.
+
+    Returns:
+        str: Folded VEVENT lines.
+    """
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{booking.id}@{UID_DOMAIN}',
+        f'DTSTAMP:{booking.timestamp.astimezone(dt_timezone.utc):%Y%m%dT%H%M%SZ}',
+        f'DTSTART{_format_datetime(booking.date, booking.start_time)}',
+        f'DTEND{_format_datetime(booking.date, booking.end_time)}',
+        f'SUMMARY:{escape_text(f"{room_name} ({team_name})" if team_name else room_name)}',
+        f'LOCATION:{escape_text(room_name)}',
+        'STATUS:CONFIRMED',
+    ]
+    if organizer:
+        name, email = organizer
+        lines.append(f'ORGANIZER;CN={param_value(name)}:mailto:{email}')
+    if booking.team_id:
+        lines.append(f'X-BOOKING-TEAM-ID:{booking.team_id}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) for line in lines)
+
+
+def calendar_stream(events, name):
+    """
+    Wrap an iterable of rendered VEVENTs into a VCALENDAR, yielding chunks as they are produced.
+    """
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ))
+    yield from events
+    yield fold('END:VCALENDAR')
+
+
+def _unfolded_lines(lines):
+    pending = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield pending
+        pending = line
+    if pending:
+        yield pending
+
+
+def _parse_datetime(params, value):
+    """
+    Convert a DATE-TIME value to a naive wall-clock datetime in settings.TIME_ZONE.
+    """
+    local_zone = ZoneInfo(settings.TIME_ZONE)
+    if value.endswith('Z'):
+        parsed = datetime.strptime(value[:-1], '%Y%m%dT%H%M%S').replace(tzinfo=dt_timezone.utc)
+    else:
+        parsed = datetime.strptime(value, '%Y%m%dT%H%M%S')
+        if 'TZID' in params:
+            try:
+                parsed = parsed.replace(tzinfo=ZoneInfo(params['TZID'].strip('"')))
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f'Unknown time zone "{params["TZID"]}".')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(local_zone).replace(tzinfo=None)
+    return parsed
+
+
+def _split_unquoted(text, separator, maxsplit=-1):
+    """
+    Split on `separator` outside double-quoted parameter values.
+    """
+    parts, start, quoted = [], 0, False
+    for index, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif char == separator and not quoted and maxsplit != 0:
+            parts.append(text[start:index])
+            start, maxsplit = index + 1, maxsplit - 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_events(lines):
+    """
+    Incrementally parse VEVENTs from an iterable of ICS lines (e.g. an open file).
+
+    Yields:
+        tuple: (line number of BEGIN:VEVENT, dict of the event's properties or a ValueError).
+        Properties are `start` and `end` (naive datetimes in settings.TIME_ZONE), `location`,
+        `summary`, `uid`, `organizer_email` and `team_id` when present.
+    """
+    event, start_line, error = None, 0, None
+    for number, line in enumerate(_unfolded_lines(lines), start=1):
+        if line == 'BEGIN:VEVENT':
+            event, start_line, error = {}, number, None
+            continue
+        if event is None:
+            continue
+        if line == 'END:VEVENT':
+            yield start_line, error or event
+            event = None
+            continue
+        name_part, value = (_split_unquoted(line, ':', maxsplit=1) + [''])[:2]
+        name, *raw_params = _split_unquoted(name_part, ';')
+        params = dict(param.partition('=')[::2] for param in raw_params)
+        name = name.upper()
+        try:
+            if name == 'DTSTART':
+                event['start'] = _parse_datetime(params, value)
+            elif name == 'DTEND':
+                event['end'] = _parse_datetime(params, value)
+            elif name == 'LOCATION':
+                event['location'] = unescape_text(value)
+            elif name == 'SUMMARY':
+                event['summary'] = unescape_text(value)
+            elif name == 'UID':
+                event['uid'] = value
+            elif name == 'ORGANIZER' and value.lower().startswith('mailto:'):
+                event['organizer_email'] = value[len('mailto:'):]
+            elif name == 'X-BOOKING-TEAM-ID':
+                event['team_id'] = int(value)
+        except ValueError as exc:
+            error = error or ValueError(f'{name}: {exc}')
@@ -0,0 +1,93 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+from .routers import current_shard
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+
+def idempotency_key_ttl():
+    """
+    Return how long a stored response is replayed for, from settings.IDEMPOTENCY_KEY_TTL.
+    """
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24))
+
+
+def request_fingerprint(request):
+    """
+    Hash the method, path, query and parsed body so a key cannot be reused for a different request.
+    """
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    digest.update(json.dumps(request.data, sort_keys=True, cls=JSONEncoder).encode())
+    return digest.hexdigest()
+
+
+def _lookup(user, key):
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record and record.created_at < timezone.now() - idempotency_key_ttl():
+        record.delete()
+        return None
+    return record
+
+
+def _replay(record, fingerprint):
+    if record.request_fingerprint != fingerprint:
+        return Response({"error": "Idempotency-Key was already used for a different request."}, status=422)
+    return Response(record.response_body, status=record.response_status, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method):
+    """
+    Decorator for APIView handlers that replays the stored response when a request
+    is retried with the same Idempotency-Key header.
+
+    The key is stored in the shard active for the request, inside the transaction
+    opened by shard_atomic, so the handler's writes and the stored response are
+    committed together: a retry either sees the first response or runs the handler
+    as if it were the first attempt. Must be applied inside @shard_atomic.
+    Requests without the header are passed through unchanged.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key must be at most 255 characters."}, status=400)
+
+        fingerprint = request_fingerprint(request)
+        record = _lookup(request.user, key)
+        if record:
+            return _replay(record, fingerprint)
+
+        try:
+            with transaction.atomic(using=current_shard()):
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_fingerprint=fingerprint,
+                        response_status=response.status_code,
+                        response_body=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+                    )
+        except IntegrityError:
+            # A concurrent retry stored its response first; replay that one instead
+            record = _lookup(request.user, key)
+            if record is None:
+                raise
+            return _replay(record, fingerprint)
+        return response
+
+    return wrapper
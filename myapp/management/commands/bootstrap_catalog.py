@@ -0,0 +1,225 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from myapp.models import Booking, Location, Room, Timeslot
+from myapp.routers import shard_databases, use_shard
+from myapp.timeslots import invalidate_timeslot_catalog
+
+SECTIONS = ('locations', 'timeslots', 'rooms')
+
+class Command(BaseCommand):
+    help = 'Create or update locations, timeslots and rooms from a declarative catalog spec (JSON or YAML)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('spec', nargs='?', default=str(Path(settings.BASE_DIR) / 'catalog.json'),
+                            help='Path to the catalog spec (default: catalog.json in the project root)')
+        parser.add_argument('--only', action='append', choices=SECTIONS,
+                            help='Only sync the given section (can be repeated)')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete timeslots and rooms missing from the spec; those with bookings are retired')
+        parser.add_argument('--restore-retired', action='store_true',
+                            help='Restore retired timeslots and rooms listed in the spec (default: leave them retired)')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without applying them')
+
+    def handle(self, *args, **options):
+        spec = self.load_spec(options['spec'])
+        self.prune = options['prune']
+        self.dry_run = options['dry_run']
+        self.restore_retired = options['restore_retired']
+        self.verbosity = options['verbosity']
+        sections = options['only'] or SECTIONS
+
+        changes = []
+        if 'locations' in sections:
+            changes.append(('locations', self.sync_locations(spec.get('locations', []))))
+        if 'timeslots' in sections:
+            changes.append(('timeslots', self.sync_timeslots(spec.get('timeslots', []))))
+        if 'rooms' in sections:
+            changes.append(('rooms', self.sync_rooms(spec.get('rooms', []))))
+
+        summary = ', '.join(
+            f'{name}: {created} created, {updated} updated, {deleted} deleted'
+            for name, (created, updated, deleted) in changes
+        )
+        prefix = 'Dry run - ' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}Catalog in sync ({summary}).'))
+
+    def load_spec(self, path):
+        path = Path(path)
+        if not path.exists():
+            raise CommandError(f'Catalog spec "{path}" does not exist.')
+        with path.open() as spec_file:
+            if path.suffix in ('.yml', '.yaml'):
+                try:
+                    import yaml
+                except ImportError:
+                    raise CommandError('PyYAML is required to read YAML catalog specs; install it or use JSON.')
+                spec = yaml.safe_load(spec_file) or {}
+            else:
+                spec = json.load(spec_file)
+        if not isinstance(spec, dict):
+            raise CommandError('Catalog spec must be a mapping with "locations", "timeslots" and "rooms" lists.')
+        return spec
+
+    def sync_locations(self, entries):
+        """
+        Create or update locations by code. Locations are never deleted, and their
+        database is never changed: their rooms and bookings would stay behind in the old one.
+        """
+        existing = {location.code: location for location in Location.objects.all()}
+        to_create, to_update, to_delete = [], [], []
+        for entry in entries:
+            if entry.get('database', 'default') not in shard_databases():
+                raise CommandError(f'Location "{entry["code"]}" uses unknown database "{entry.get("database")}".')
+            location = existing.get(entry['code'])
+            values = {'name': entry['name'], 'database': entry.get('database', 'default')}
+            if location is None:
+                to_create.append(Location(code=entry['code'], **values))
+            elif location.database != values['database']:
+                raise CommandError(
+                    f'Location "{location.code}" is stored in database "{location.database}", not "{values["database"]}"; '
+                    'moving a location between databases is not supported.'
+                )
+            elif location.name != values['name']:
+                location.name = values['name']
+                to_update.append(location)
+
+        if not self.dry_run and (to_create or to_update or to_delete):
+            with transaction.atomic():
+                Location.objects.bulk_create(to_create)
+                Location.objects.bulk_update(to_update, ['name'])
+        return len(to_create), len(to_update), 0
+
+    def sync_timeslots(self, entries):
+        """
+        Create missing timeslots (matched by start and end time) and update their names.
+        Listed timeslots that were retired are left alone unless --restore-retired is given.
+        """
+        existing = {(slot.start_time, slot.end_time): slot for slot in Timeslot.objects.all()}
+        wanted = set()
+        to_create, to_update = [], []
+        for entry in entries:
+            start_time, end_time = parse_time(entry['start_time']), parse_time(entry['end_time'])
+            if not start_time or not end_time or start_time >= end_time:
+                raise CommandError(f'Invalid timeslot {entry}.')
+            wanted.add((start_time, end_time))
+            slot = existing.get((start_time, end_time))
+            if slot is None:
+                slot = Timeslot(start_time=start_time, end_time=end_time, name=entry.get('name', ''))
+                # bulk_create skips Timeslot.save(), which normally fills in the name
+                slot.name = slot.name or slot.generate_default_name()
+                to_create.append(slot)
+            elif slot.is_retired and not self.restore_retired:
+                self.skip_retired(f'timeslot "{slot.name}"')
+            elif (entry.get('name') and slot.name != entry['name']) or slot.is_retired:
+                slot.name = entry.get('name') or slot.name
+                slot.retired_at = None
+                to_update.append(slot)
+
+        to_delete, to_retire = [], []
+        if self.prune:
+            stale = [slot.id for key, slot in existing.items() if key not in wanted and not slot.is_retired]
+            referenced = self.referenced_ids('time_slot_id', stale)
+            to_delete = [slot_id for slot_id in stale if slot_id not in referenced]
+            # Deleting these would cascade through their bookings; purge_retired removes them later
+            to_retire = [slot_id for slot_id in stale if slot_id in referenced]
+
+        if not self.dry_run and (to_create or to_update or to_delete or to_retire):
+            with transaction.atomic():
+                Timeslot.objects.bulk_create(to_create)
+                Timeslot.objects.bulk_update(to_update, ['name', 'retired_at'])
+                Timeslot.objects.filter(id__in=to_delete).delete()
+                Timeslot.objects.filter(id__in=to_retire).update(retired_at=timezone.now())
+                # bulk_create and bulk_update do not send the signals that refresh the cache
+                invalidate_timeslot_catalog()
+        return len(to_create), len(to_update), len(to_delete) + len(to_retire)
+
+    def sync_rooms(self, entries):
+        """
+        Create or update rooms by name in their location's database. With --prune, rooms
+        that have bookings are retired rather than deleted. Listed retired rooms are left
+        alone unless --restore-retired is given.
+        """
+        locations = {code: (location_id, database) for location_id, code, database in
+                     Location.objects.values_list('id', 'code', 'database')}
+        wanted = {alias: {} for alias in shard_databases()}
+        for entry in entries:
+            code = entry.get('location')
+            if code and code not in locations:
+                raise CommandError(f'Room "{entry["name"]}" refers to unknown location "{code}".')
+            location_id, alias = locations[code] if code else (None, 'default')
+            if entry['name'] in wanted[alias]:
+                raise CommandError(f'Room "{entry["name"]}" is listed more than once.')
+            wanted[alias][entry['name']] = {
+                'room_type': entry['room_type'],
+                'capacity': entry.get('capacity'),
+                'location_id': location_id,
+            }
+            if self.restore_retired:
+                wanted[alias][entry['name']]['retired_at'] = None
+
+        totals = [0, 0, 0]
+        for alias, rooms in wanted.items():
+            with use_shard(alias):
+                for index, count in enumerate(self.sync_shard_rooms(alias, rooms)):
+                    totals[index] += count
+        return tuple(totals)
+
+    def sync_shard_rooms(self, alias, wanted):
+        existing = {room.name: room for room in Room.objects.all()}
+        to_create, to_update = [], []
+        for name, values in wanted.items():
+            room = existing.get(name)
+            if room is None:
+                to_create.append(Room(name=name, **values))
+            elif room.is_retired and not self.restore_retired:
+                self.skip_retired(f'room "{name}" in {alias}')
+            elif any(getattr(room, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(room, field, value)
+                to_update.append(room)
+
+        to_delete, booked = [], set()
+        if self.prune:
+            stale = [room.id for name, room in existing.items() if name not in wanted and not room.is_retired]
+            booked = set(
+                Booking.objects.filter(room_id__in=stale).values_list('room_id', flat=True).distinct()
+            ) if stale else set()
+            for name, room in existing.items():
+                if room.id in booked:
+                    self.stdout.write(self.style.WARNING(
+                        f'Retiring room "{name}" in {alias}: it has bookings, purge_retired will delete it.'
+                    ))
+            to_delete = [room_id for room_id in stale if room_id not in booked]
+
+        if not self.dry_run and (to_create or to_update or to_delete or booked):
+            with transaction.atomic(using=alias):
+                Room.objects.bulk_create(to_create, batch_size=500)
+                Room.objects.bulk_update(
+                    to_update, ['room_type', 'capacity', 'location_id', 'retired_at'], batch_size=500
+                )
+                Room.objects.filter(id__in=to_delete).delete()
+                Room.objects.filter(id__in=booked).update(retired_at=timezone.now())
+        return len(to_create), len(to_update), len(to_delete) + len(booked)
+
+    def skip_retired(self, label):
+        # Bootstrap runs on every start, so retired rows are only listed on request
+        if self.verbosity >= 2:
+            self.stdout.write(f'Skipping retired {label}; use --restore-retired to restore it.')
+
+    def referenced_ids(self, field, ids):
+        """
+        Return which of `ids` are referenced by bookings in any shard through `field`.
+        """
+        if not ids:
+            return set()
+        referenced = set()
+        for alias in shard_databases():
+            referenced.update(
+                Booking.objects.using(alias).filter(**{f'{field}__in': ids}).values_list(field, flat=True).distinct()
+            )
+        return referenced
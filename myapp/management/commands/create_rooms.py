@@ -1,35 +1,9 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from myapp.models import Room
 
 class Command(BaseCommand):
-    help = 'Create 15 rooms: 8 private, 4 conference, 3 shared'
+    help = 'Create or update the rooms listed in catalog.json (8 private, 4 conference, 3 shared by default)'
 
     def handle(self, *args, **kwargs):
-        # Clear existing rooms (optional)
-        Room.objects.all().delete()
-
-        # Create 8 private rooms
-        for i in range(1, 9):
-            Room.objects.create(
-                name=f'Private Room {i}',
-                room_type='private',
-                capacity=1
-            )
-
-        # Create 4 conference rooms
-        for i in range(1, 5):
-            Room.objects.create(
-                name=f'Conference Room {i}',
-                room_type='conference',
-                capacity=10
-            )
-
-        # Create 3 shared desks
-        for i in range(1, 4):
-            Room.objects.create(
-                name=f'Shared Desk {i}',
-                room_type='shared',
-                capacity=4
-            )
-
-        self.stdout.write(self.style.SUCCESS('Successfully created 15 rooms'))
+        # Rooms are no longer wiped and recreated; existing rooms and their bookings are kept
+        call_command('bootstrap_catalog', only=['locations', 'rooms'], stdout=self.stdout)
@@ -0,0 +1,235 @@
+import csv
+import uuid
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_time
+
+from myapp.audit import record_event
+from myapp.ics import UID_DOMAIN, parse_events
+from myapp.models import SHARED_DESK_SEATS, Booking, Location, Room, RoomDayOccupancy, Team, Timeslot, User
+from myapp.occupancy import load_counts, peak_load, save_counts, unit_range
+from myapp.routers import use_shard
+
+class Command(BaseCommand):
+    help = 'Bulk import bookings from an iCalendar (.ics) or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=('ics', 'csv'), help='File format (default: from the file extension)')
+        parser.add_argument('--location', help='Location code of the rooms (default: rooms without a location)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bookings checked and inserted per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Check every booking without writing anything')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('ics', 'csv'):
+            raise CommandError('Use --format to choose between ics and csv.')
+        if not path.exists():
+            raise CommandError(f'{path} does not exist.')
+
+        self.location_id, alias = None, 'default'
+        if options['location']:
+            location = Location.objects.filter(code=options['location']).values_list('id', 'database').first()
+            if location is None:
+                raise CommandError(f'Location "{options["location"]}" does not exist.')
+            self.location_id, alias = location
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.granularity = getattr(settings, 'BOOKING_GRANULARITY_MINUTES', 15)
+        self.stats = {'imported': 0, 'conflicts': 0, 'invalid': 0, 'duplicates': 0}
+
+        with use_shard(alias), open(path, newline='', encoding='utf-8') as source:
+            self.load_name_maps()
+            rows = self.read_ics(source) if file_format == 'ics' else self.read_csv(source)
+            while batch := list(islice(rows, options['batch_size'])):
+                self.import_batch(batch)
+
+        verb = 'Would import' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {self.stats["imported"]} bookings ({self.stats["conflicts"]} conflicts, '
+            f'{self.stats["invalid"]} invalid, {self.stats["duplicates"]} already imported).'
+        ))
+
+    def load_name_maps(self):
+        """
+        Keep every active room of the location and the timeslot catalog in memory, so rows
+        resolve names without queries. Users and teams are resolved per batch.
+        """
+        self.rooms = {room.name: room for room in Room.objects.active().filter(location_id=self.location_id)}
+        slots = list(Timeslot.objects.active())
+        self.slots_by_name = {slot.name: slot for slot in slots}
+        self.slots_by_interval = {(slot.start_time, slot.end_time): slot for slot in slots}
+
+    # Readers yield (line number, row dict or error message); rows hold room, date,
+    # start_time, end_time, time_slot, user_email, team_id and id
+    def read_ics(self, source):
+        for line, event in parse_events(source):
+            if isinstance(event, ValueError):
+                yield line, str(event)
+                continue
+            if 'start' not in event or 'end' not in event or not event.get('location'):
+                yield line, 'DTSTART, DTEND and LOCATION are required.'
+                continue
+            if event['start'].date() != event['end'].date():
+                yield line, 'Bookings must start and end on the same day.'
+                continue
+            uid = event.get('uid', '')
+            yield line, {
+                'id': uid[:-len(f'@{UID_DOMAIN}')] if uid.endswith(f'@{UID_DOMAIN}') else None,
+                'room': event['location'],
+                'date': event['start'].date(),
+                'start_time': event['start'].time(),
+                'end_time': event['end'].time(),
+                'time_slot': None,
+                'user_email': event.get('organizer_email'),
+                'team_id': event.get('team_id'),
+            }
+
+    def read_csv(self, source):
+        reader = csv.DictReader(source)
+        missing = {'room', 'date'} - set(reader.fieldnames or [])
+        if missing:
+            raise CommandError(f'CSV is missing columns: {", ".join(sorted(missing))}.')
+        for row in reader:
+            try:
+                yield reader.line_num, {
+                    'id': row.get('id') or None,
+                    'room': row['room'],
+                    'date': parse_date(row['date']),
+                    'start_time': parse_time(row['start_time']) if row.get('start_time') else None,
+                    'end_time': parse_time(row['end_time']) if row.get('end_time') else None,
+                    'time_slot': row.get('time_slot') or None,
+                    'user_email': row.get('user_email') or None,
+                    'team_id': int(row['team_id']) if row.get('team_id') else None,
+                }
+            except ValueError as exc:
+                yield reader.line_num, str(exc)
+
+    def skip(self, line, reason, counter='invalid'):
+        self.stats[counter] += 1
+        if self.verbosity > 1:
+            self.stderr.write(f'line {line}: {reason}')
+
+    def import_batch(self, batch):
+        """
+        Resolve, conflict-check and insert one batch with a fixed number of queries.
+        """
+        rows = []
+        for line, row in batch:
+            if isinstance(row, str):
+                self.skip(line, row)
+            else:
+                rows.append((line, row))
+
+        emails = {row['user_email'] for _, row in rows if row['user_email']}
+        users = dict(User.objects.active().filter(email__in=emails).values_list('email', 'id')) if emails else {}
+        team_ids = {row['team_id'] for _, row in rows if row['team_id']}
+        teams = set(Team.objects.active().filter(id__in=team_ids).values_list('id', flat=True)) if team_ids else set()
+        ids = set()
+        for _, row in rows:
+            try:
+                row['id'] = uuid.UUID(row['id']) if row['id'] else uuid.uuid4()
+            except ValueError:
+                row['id'] = uuid.uuid4()
+            ids.add(row['id'])
+        existing = set(Booking.objects.filter(id__in=ids).values_list('id', flat=True))
+
+        candidates = []
+        for line, row in rows:
+            booking = self.resolve(line, row, users, teams, existing)
+            if booking is not None:
+                candidates.append((line, booking))
+        if not candidates:
+            return
+
+        if self.dry_run:
+            self.check_conflicts(candidates)
+            return
+        with transaction.atomic(using=Booking.objects.db):
+            accepted, counts = self.check_conflicts(candidates, lock=True)
+            Booking.objects.bulk_create(accepted, batch_size=500)
+            save_counts(counts)
+            for booking in accepted:
+                record_event('booking_created', booking, source='import')
+
+    def resolve(self, line, row, users, teams, existing):
+        room = self.rooms.get(row['room'])
+        if room is None:
+            self.skip(line, f'Room "{row["room"]}" does not exist.')
+            return None
+        if row['date'] is None:
+            self.skip(line, 'date must be in YYYY-MM-DD format.')
+            return None
+        slot = None
+        if row['time_slot']:
+            slot = self.slots_by_name.get(row['time_slot'])
+            if slot is None:
+                self.skip(line, f'Timeslot "{row["time_slot"]}" does not exist.')
+                return None
+            start_time, end_time = slot.start_time, slot.end_time
+        else:
+            start_time, end_time = row['start_time'], row['end_time']
+            if start_time is None or end_time is None or start_time >= end_time:
+                self.skip(line, 'Provide a time_slot or a start_time before end_time.')
+                return None
+            if any(value.minute % self.granularity or value.second for value in (start_time, end_time)):
+                self.skip(line, f'Times must be on a {self.granularity}-minute boundary.')
+                return None
+            slot = self.slots_by_interval.get((start_time, end_time))
+
+        user_id = users.get(row['user_email']) if row['user_email'] else None
+        team_id = row['team_id'] if row['team_id'] in teams else None
+        if row['user_email'] and user_id is None:
+            self.skip(line, f'User "{row["user_email"]}" does not exist.')
+            return None
+        if row['team_id'] and team_id is None:
+            self.skip(line, f'Team {row["team_id"]} does not exist.')
+            return None
+        if bool(user_id) == bool(team_id):
+            self.skip(line, 'A booking needs exactly one of a user or a team.')
+            return None
+        if bool(team_id) != (room.room_type == 'conference'):
+            self.skip(line, 'Conference rooms are booked by teams, other rooms by users.')
+            return None
+        if row['id'] in existing:
+            self.skip(line, f'Booking {row["id"]} already exists.', counter='duplicates')
+            return None
+        existing.add(row['id'])
+
+        return Booking(
+            id=row['id'], room=room, date=row['date'], time_slot=slot,
+            start_time=start_time, end_time=end_time, user_id=user_id, team_id=team_id,
+        )
+
+    def check_conflicts(self, candidates, lock=False):
+        """
+        Check a batch against stored occupancy and against itself.
+
+        Returns:
+            tuple: (bookings without conflicts, updated counts of the room-days they touch).
+        """
+        room_ids = {booking.room_id for _, booking in candidates}
+        dates = {booking.date for _, booking in candidates}
+        if lock:
+            # Hold the stored rows so live bookings cannot interleave with this batch
+            list(RoomDayOccupancy.objects.select_for_update().filter(room_id__in=room_ids, date__in=dates).values_list('id'))
+        counts = {key: bytearray(room_counts) for key, room_counts in load_counts(room_ids, dates).items()}
+
+        accepted, touched = [], set()
+        for line, booking in candidates:
+            key = (booking.room_id, booking.date)
+            seats = SHARED_DESK_SEATS if booking.room.room_type == 'shared' else 1
+            if peak_load(counts[key], booking.start_time, booking.end_time) >= seats:
+                self.skip(line, f'{booking.room.name} is already booked on {booking.date} at {booking.start_time:%H:%M}.', counter='conflicts')
+                continue
+            for unit in unit_range(booking.start_time, booking.end_time):
+                counts[key][unit] += 1
+            touched.add(key)
+            accepted.append(booking)
+        self.stats['imported'] += len(accepted)
+        return accepted, {key: counts[key] for key in touched}
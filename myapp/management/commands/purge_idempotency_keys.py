@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from myapp.idempotency import idempotency_key_ttl
+from myapp.models import IdempotencyKey
+from myapp.routers import shard_databases
+
+class Command(BaseCommand):
+    help = 'Delete stored idempotency keys older than IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **kwargs):
+        cutoff = timezone.now() - idempotency_key_ttl()
+        deleted = 0
+        # Keys are stored in the shard of the booking they guard
+        for alias in shard_databases():
+            count, _ = IdempotencyKey.objects.using(alias).filter(created_at__lt=cutoff).delete()
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully purged {deleted} idempotency keys.'))
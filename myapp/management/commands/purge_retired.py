@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from myapp.retirement import RetirementPurger
+
+class Command(BaseCommand):
+    help = 'Delete retired rooms, timeslots, teams and users with their bookings, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int,
+                            help='Only purge rows retired at least this many seconds ago (default: RETIREMENT["PURGE_AFTER"])')
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per transaction (default: RETIREMENT["BATCH_SIZE"])')
+        parser.add_argument('--pause', type=float, help='Seconds to sleep between batches (default: RETIREMENT["PAUSE"])')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be purged without deleting anything')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+        older_than = timedelta(seconds=options['older_than']) if options['older_than'] is not None else None
+
+        purger = RetirementPurger(batch_size=options['batch_size'], pause=options['pause'], dry_run=options['dry_run'])
+        counts = purger.purge(older_than)
+
+        prefix = 'Dry run - would purge' if options['dry_run'] else 'Purged'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {counts['rooms']} rooms, {counts['timeslots']} timeslots, {counts['teams']} teams "
+            f"and {counts['users']} users ({counts['bookings']} bookings)."
+        ))
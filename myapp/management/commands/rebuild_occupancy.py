@@ -0,0 +1,97 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from myapp.models import Booking, RoomDayOccupancy, Timeslot
+from myapp.occupancy import counts_from_intervals, interval_rows, publish_counts, units_per_day
+from myapp.routers import shard_databases, use_shard
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the room-day occupancy store against active bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only report mismatches, do not write')
+        parser.add_argument('--from-date', help='First date to reconcile (YYYY-MM-DD)')
+        parser.add_argument('--to-date', help='Last date to reconcile (YYYY-MM-DD)')
+        parser.add_argument('--database', help='Shard database to reconcile (default: all shards)')
+
+    def handle(self, *args, **options):
+        for alias in [options['database']] if options['database'] else shard_databases():
+            with use_shard(alias):
+                self.reconcile_shard(alias, options)
+
+    def reconcile_shard(self, alias, options):
+        self.backfill_intervals(alias, options['verify'])
+        bookings = Booking.objects.filter(is_active=True)
+        stored = RoomDayOccupancy.objects.all()
+        if options['from_date']:
+            bookings = bookings.filter(date__gte=parse_date(options['from_date']))
+            stored = stored.filter(date__gte=parse_date(options['from_date']))
+        if options['to_date']:
+            bookings = bookings.filter(date__lte=parse_date(options['to_date']))
+            stored = stored.filter(date__lte=parse_date(options['to_date']))
+
+        dates = sorted(set(bookings.dates('date', 'day')) | set(stored.dates('date', 'day')))
+        mismatched = 0
+        for date in dates:
+            mismatched += self.reconcile_day(bookings.filter(date=date), stored.filter(date=date), date, options['verify'])
+
+        if options['verify']:
+            self.stdout.write(self.style.SUCCESS(f'{alias}: checked {len(dates)} days, {mismatched} room-days out of sync.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{alias}: checked {len(dates)} days, repaired {mismatched} room-days.'))
+
+    def backfill_intervals(self, alias, verify):
+        """
+        Copy start and end times from the time slot onto bookings made before intervals
+        were stored, with one UPDATE per timeslot.
+        """
+        legacy = Booking.objects.filter(time_slot__isnull=False, start_time__isnull=True)
+        if verify:
+            missing = legacy.count()
+            if missing:
+                self.stdout.write(self.style.WARNING(f'{alias}: {missing} bookings have no stored interval.'))
+            return
+        filled = 0
+        for slot_id, start_time, end_time in Timeslot.objects.values_list('id', 'start_time', 'end_time'):
+            filled += legacy.filter(time_slot_id=slot_id).update(start_time=start_time, end_time=end_time)
+        if filled:
+            self.stdout.write(self.style.SUCCESS(f'{alias}: filled in the interval of {filled} bookings.'))
+
+    def reconcile_day(self, bookings, stored, date, verify):
+        """
+        Compare one day's stored occupancy rows with its bookings and fix any differences.
+
+        Returns:
+            int: Number of room-days that were out of sync.
+        """
+        with transaction.atomic(using=bookings.db):
+            return self._reconcile_day(bookings, stored, date, verify)
+
+    def _reconcile_day(self, bookings, stored, date, verify):
+        intervals = defaultdict(list)
+        for room_id, start_time, end_time in interval_rows(bookings, 'room_id'):
+            intervals[room_id].append((start_time, end_time))
+        expected = {room_id: bytes(counts_from_intervals(room_intervals)) for room_id, room_intervals in intervals.items()}
+        rows = {row.room_id: row for row in stored.select_for_update()}
+        empty = bytes(units_per_day())
+
+        to_create, to_update = [], []
+        now = timezone.now()
+        for room_id in expected.keys() | rows.keys():
+            counts = expected.get(room_id, empty)
+            row = rows.get(room_id)
+            if row is None:
+                to_create.append(RoomDayOccupancy(room_id=room_id, date=date, slot_counts=counts))
+            elif bytes(row.slot_counts) != counts:
+                row.slot_counts = counts
+                row.updated_at = now
+                to_update.append(row)
+
+        if not verify:
+            RoomDayOccupancy.objects.bulk_create(to_create, batch_size=500)
+            # bulk_update skips auto_now, so the repaired rows get their new version explicitly
+            RoomDayOccupancy.objects.bulk_update(to_update, ['slot_counts', 'updated_at'], batch_size=500)
+            publish_counts(to_create + to_update)
+        return len(to_create) + len(to_update)
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from myapp.models import Booking, Room, RoomDayOccupancy
+from myapp.occupancy import counts_from_intervals, interval_rows, units_per_day
+from myapp.occupancy_shm import shared_table, shm_setting, version_of
+from myapp.routers import shard_databases, use_shard
+
+class Command(BaseCommand):
+    help = "Rebuild or verify this host's shared memory occupancy table from active bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only report cells that disagree with bookings')
+        parser.add_argument('--from-date', help='First date to load (YYYY-MM-DD, default: today)')
+        parser.add_argument('--days', type=int, help='Number of days to load (default: OCCUPANCY_SHM["DAYS"])')
+        parser.add_argument('--database', help='Shard database to rebuild (default: all shards)')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['from_date']) if options['from_date'] else timezone.localdate()
+        if start is None:
+            raise CommandError('--from-date must be in YYYY-MM-DD format.')
+        days = options['days'] or shm_setting('DAYS')
+        dates = [start + timedelta(days=offset) for offset in range(days)]
+
+        for alias in [options['database']] if options['database'] else shard_databases():
+            table = shared_table(alias, units_per_day())
+            if table is None:
+                raise CommandError('The shared occupancy table is disabled or unsupported on this platform.')
+            with use_shard(alias):
+                self.rebuild(alias, table, dates, options['verify'])
+
+    def rebuild(self, alias, table, dates, verify):
+        if not verify:
+            # Reset before reading, so every write committed after the reads below
+            # publishes a newer version than the one loaded here and is kept
+            table.reset()
+        # Versions are read before bookings: a write committed in between then leaves
+        # the loaded counts with an older version than the one it publishes
+        versions = {
+            (room_id, date): version_of(updated_at)
+            for room_id, date, updated_at in RoomDayOccupancy.objects.filter(
+                date__gte=dates[0], date__lte=dates[-1]
+            ).values_list('room_id', 'date', 'updated_at').iterator(chunk_size=2000)
+        }
+        intervals = defaultdict(list)
+        for room_id, date, start_time, end_time in interval_rows(Booking.objects.filter(
+            is_active=True, date__gte=dates[0], date__lte=dates[-1]
+        ), 'room_id', 'date', chunk_size=2000):
+            intervals[(room_id, date)].append((start_time, end_time))
+        room_ids = list(Room.objects.values_list('id', flat=True))
+        expected = {
+            (room_id, date): bytes(counts_from_intervals(intervals.get((room_id, date), [])))
+            for room_id in room_ids for date in dates
+        }
+
+        if verify:
+            stale = sum(
+                1 for (room_id, date), counts in expected.items()
+                if (cached := table.get(room_id, date)) is not None and bytes(cached) != counts
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: checked {len(expected)} room-days, {stale} out of sync (generation {table.generation}).'
+            ))
+            return
+
+        table.put_many(
+            (room_id, date, counts, versions.get((room_id, date), 0)) for (room_id, date), counts in expected.items()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{alias}: loaded {len(expected)} room-days for {len(room_ids)} rooms (generation {table.generation}).'
+        ))
@@ -0,0 +1,93 @@
+import json
+import pstats
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.profiling import PROFILE_SUFFIX, STATS_SUFFIX, profile_directory
+
+# Collapse parameter lists so the same statement with different arguments groups together
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+
+
+def normalize_sql(sql):
+    return ' '.join(_IN_LIST.sub('(%s, ...)', sql).split())
+
+
+class Command(BaseCommand):
+    help = 'Summarize the top functions, SQL statements and allocation sites across captured request profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', help='Profile directory (default: PROFILING["DIRECTORY"])')
+        parser.add_argument('--view', action='append', help='Only include profiles of this view name (can be repeated)')
+        parser.add_argument('--limit', type=int, default=20, help='Rows per section (default: 20)')
+        parser.add_argument('--match', help='Only list functions whose file path contains this text, e.g. "myapp/"')
+        parser.add_argument('--sort', choices=('cumulative', 'tottime'), default='cumulative',
+                            help='Order functions by cumulative or own time (default: cumulative)')
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory']) if options['directory'] else profile_directory()
+        summaries = sorted(directory.glob(f'*/*{PROFILE_SUFFIX}'))
+        if options['view']:
+            summaries = [path for path in summaries if path.parent.name in options['view']]
+        if not summaries:
+            raise CommandError(f'No profiles found in {directory}.')
+
+        limit = options['limit']
+        views = defaultdict(list)
+        queries = defaultdict(lambda: [0, 0.0])
+        allocations = defaultdict(lambda: [0.0, 0])
+        stats = None
+        for path in summaries:
+            with open(path) as summary_file:
+                summary = json.load(summary_file)
+            views[summary['view']].append(summary)
+            for query in summary['queries']:
+                totals = queries[normalize_sql(query['sql'])]
+                totals[0] += 1
+                totals[1] += query['ms']
+            for allocation in summary['allocations']:
+                totals = allocations[allocation['location']]
+                totals[0] += allocation['kb']
+                totals[1] += allocation['count']
+            stats_path = path.with_suffix(STATS_SUFFIX)
+            if stats_path.exists():
+                if stats is None:
+                    stats = pstats.Stats(str(stats_path))
+                else:
+                    stats.add(str(stats_path))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{len(summaries)} profiles'))
+        self.stdout.write(f'{"view":40} {"count":>6} {"mean ms":>10} {"max ms":>10} {"queries":>8}')
+        for view, entries in sorted(views.items(), key=lambda item: -sum(entry['duration_ms'] for entry in item[1])):
+            durations = [entry['duration_ms'] for entry in entries]
+            mean_queries = sum(len(entry['queries']) for entry in entries) / len(entries)
+            self.stdout.write(
+                f'{view:40} {len(entries):>6} {sum(durations) / len(durations):>10.1f} {max(durations):>10.1f} {mean_queries:>8.1f}'
+            )
+
+        if stats is not None:
+            # Stats rows: (primitive calls, total calls, own time, cumulative time, callers)
+            column = 3 if options['sort'] == 'cumulative' else 2
+            rows = [
+                item for item in stats.stats.items()
+                if not options['match'] or options['match'] in item[0][0]
+            ]
+            rows = sorted(rows, key=lambda item: item[1][column], reverse=True)[:limit]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\nTop functions by {options["sort"]} time'))
+            self.stdout.write(f'{"calls":>10} {"own s":>10} {"cum s":>10}  function')
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows:
+                self.stdout.write(f'{calls:>10} {own:>10.4f} {cumulative:>10.4f}  {filename}:{line}({name})')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nTop SQL by total time'))
+        self.stdout.write(f'{"count":>8} {"total ms":>10} {"mean ms":>10}  statement')
+        for sql, (count, total) in sorted(queries.items(), key=lambda item: -item[1][1])[:limit]:
+            self.stdout.write(f'{count:>8} {total:>10.1f} {total / count:>10.2f}  {sql[:200]}')
+
+        if allocations:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nTop allocation sites'))
+            self.stdout.write(f'{"KiB":>10} {"blocks":>10}  location')
+            for location, (kb, count) in sorted(allocations.items(), key=lambda item: -item[1][0])[:limit]:
+                self.stdout.write(f'{kb:>10.1f} {count:>10}  {location}')
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import transaction
+
+from .caching import shared_cache
+from .models import Team
+
+
+def _team_ids_key(user_id):
+    return f'team-ids:{user_id}'
+
+
+def user_team_ids(user):
+    """
+    Return the ids of the teams the user is a member of.
+
+    With a shared cache (see shared_cache) the set is cached per user
+    (settings.TEAM_IDS_CACHE_TTL) and invalidated for every worker whenever the user's
+    memberships change; otherwise it is read from the database. It scopes listings;
+    permission checks on a single team use is_team_member instead.
+    """
+    team_cache = shared_cache()
+    key = _team_ids_key(user.pk)
+    team_ids = team_cache.get(key) if team_cache else None
+    if team_ids is None:
+        team_ids = list(
+            Team.members.through.objects.filter(user_id=user.pk).values_list('team_id', flat=True)
+        )
+        if team_cache:
+            team_cache.set(key, team_ids, timeout=getattr(settings, 'TEAM_IDS_CACHE_TTL', 300))
+    return team_ids
+
+
+def is_team_member(user, team_id):
+    """
+    Check membership of one team against the database, never the cache.
+    """
+    return Team.members.through.objects.filter(user_id=user.pk, team_id=team_id).exists()
+
+
+def invalidate_user_team_ids(user_ids):
+    """
+    Drop the cached team ids of the given users, now and again once the current
+    transaction commits, so a concurrent reader cannot re-cache the old set.
+    """
+    team_cache = shared_cache()
+    keys = [_team_ids_key(user_id) for user_id in user_ids]
+    if not team_cache or not keys:
+        return
+    team_cache.delete_many(keys)
+    transaction.on_commit(lambda: team_cache.delete_many(keys))
+
+
+def team_seat_count(team):
+    """
+    Calculate the number of active team members aged 10 or older.
+
+    Args:
+        team: Team instance.
+
+    Returns:
+        int: Count of active team members aged 10 or older.
+    """
+    return team.members.active().filter(age__gte=10).count()
@@ -0,0 +1,64 @@
+import logging
+
+from rest_framework.permissions import SAFE_METHODS
+
+from .profiling import RequestProfile, acquire_profiler, release_profiler, should_profile
+from .routers import pin_to_primary
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a user's reads to the primary database for a short window after any
+    successful write request, giving read-your-writes on replica-routed endpoints.
+    The pin is a signed cookie on the write's response (see routers.pin_to_primary).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_to_primary(response, user)
+        return response
+
+
+class SamplingProfilerMiddleware:
+    """
+    Profile a sampled fraction of requests (PROFILING['SAMPLE_RATE']), and admin requests
+    carrying the PROFILING['HEADER'] header, with cProfile, tracemalloc and SQL capture.
+    Profiles are written per view name and summarized with `manage.py summarize_profiles`.
+    Only one request per process is profiled at a time.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # One profiled request per process at a time; concurrent ones run unprofiled
+        if not should_profile(request) or not acquire_profiler():
+            return self.get_response(request)
+
+        try:
+            with RequestProfile() as profile:
+                response = self.get_response(request)
+        finally:
+            release_profiler()
+        if not profile.active:
+            return response
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or 'unresolved'
+        try:
+            response['X-Profile-Id'] = profile.save(view_name, request, response)
+        except OSError:
+            logger.exception('Could not write the profile of %s.', request.path)
+        return response
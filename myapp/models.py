@@ -1,6 +1,39 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+
+# ----------------------
+# Soft Retirement
+# ----------------------
+class RetirableQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(retired_at__isnull=True)
+
+    def retired(self):
+        return self.filter(retired_at__isnull=False)
+
+class RetirableModel(models.Model):
+    """
+    Abstract base for catalog rows that are retired rather than deleted.
+
+    Retired rows are hidden from availability and booking right away; the
+    purge_retired command later deletes them with their bookings in small batches.
+    """
+    retired_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = RetirableQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def is_retired(self):
+        return self.retired_at is not None
+
+    def retire(self):
+        self.retired_at = timezone.now()
+        self.save(update_fields=['retired_at'])
 
 # ----------------------
 # Custom User Model
@@ -8,7 +41,7 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 
-class CustomUserManager(BaseUserManager):
+class CustomUserManager(BaseUserManager.from_queryset(RetirableQuerySet)):
     def create_user(self, name, email, password=None, **extra_fields):
         if not name:
             raise ValueError('The Name field is required')
@@ -24,7 +57,7 @@ class CustomUserManager(BaseUserManager):
 
         return self.create_user(name, email, password, **extra_fields)
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(RetirableModel, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
         ('user', 'User'),
@@ -45,12 +78,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.name
 
-    
+    def retire(self):
+        # Inactive users are refused by authentication; teams they created go with them
+        self.is_active = False
+        self.retired_at = timezone.now()
+        with transaction.atomic():
+            self.save(update_fields=['is_active', 'retired_at'])
+            self.created_teams.active().update(retired_at=self.retired_at)
+
 
 # ----------------------
 # Team Model
 # ----------------------
-class Team(models.Model):
+class Team(RetirableModel):
     name = models.CharField(max_length=100)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_teams')
     members = models.ManyToManyField(User, related_name='teams')
@@ -58,10 +98,25 @@ class Team(models.Model):
     def __str__(self):
         return self.name
 
+# ----------------------
+# Location Model
+# ----------------------
+class Location(models.Model):
+    """
+    A building or site. Rooms and bookings of a location are stored in its `database`
+    (one of settings.SHARD_DATABASES); locations themselves live in the global database.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    code = models.SlugField(max_length=50, unique=True)
+    database = models.CharField(max_length=50, default='default')
+
+    def __str__(self):
+        return self.name
+
 # ----------------------
 # Room Model
 # ----------------------
-class Room(models.Model):
+class Room(RetirableModel):
     ROOM_TYPES = (
         ('private', 'Private'),
         ('conference', 'Conference'),
@@ -70,14 +125,21 @@ class Room(models.Model):
     name = models.CharField(max_length=100)
     room_type = models.CharField(max_length=20, choices=ROOM_TYPES)
     capacity = models.PositiveIntegerField(null=True, blank=True)
+    # Locations live in the global database, so no database-level constraint across shards
+    location = models.ForeignKey(
+        Location, on_delete=models.DO_NOTHING, null=True, blank=True, related_name='rooms', db_constraint=False
+    )
 
     def __str__(self):
         return f"{self.name} ({self.room_type})"
 
+# Maximum concurrent bookings per shared desk room and slot
+SHARED_DESK_SEATS = 4
+
 # ----------------------
 # Booking Model
 # ----------------------
-class Timeslot(models.Model):
+class Timeslot(RetirableModel):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     start_time = models.TimeField()
     end_time = models.TimeField()
@@ -119,9 +181,12 @@ class Booking(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     date = models.DateField()
-    time_slot = models.ForeignKey(Timeslot, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)  # for private/shared
-    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True)  # for conference
+    # Bookings live in their location's shard, so references to global rows have no database-level constraint
+    time_slot = models.ForeignKey(Timeslot, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)  # null for free-form intervals
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)  # for private/shared
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)  # for conference
     timestamp = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
@@ -134,12 +199,167 @@ class Booking(models.Model):
             models.CheckConstraint(
                 check=~(models.Q(user__isnull=False) & models.Q(team__isnull=False)),
                 name='booking_cannot_have_both_user_and_team'
+            ),
+            models.CheckConstraint(
+                check=models.Q(start_time__lt=models.F('end_time')),
+                name='booking_start_before_end'
             )
         ]
+        indexes = [
+            # Serves the interval overlap query used for conflict detection
+            models.Index(fields=['room', 'date', 'start_time', 'end_time'], name='booking_room_date_interval_idx'),
+            # Serves active-booking listings and the admin is_active/date filters
+            models.Index(fields=['is_active', 'date'], name='booking_active_date_idx'),
+            # Serve the per-user and per-team halves of the "my bookings" listing
+            models.Index(fields=['user', 'is_active', 'date'], name='booking_user_active_idx'),
+            models.Index(fields=['team', 'is_active', 'date'], name='booking_team_active_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Slot bookings cover exactly the slot's interval
+        if self.time_slot_id and (self.start_time is None or self.end_time is None):
+            self.start_time = self.time_slot.start_time
+            self.end_time = self.time_slot.end_time
+        super().save(*args, **kwargs)
+
+    def time_label(self):
+        if self.time_slot_id:
+            return str(self.time_slot)
+        return f"{self.start_time:%H:%M} - {self.end_time:%H:%M}"
 
     def __str__(self):
         if self.user:
-            return f"Booking by {self.user.name} on {self.date} ({self.time_slot})"
+            return f"Booking by {self.user.name} on {self.date} ({self.time_label()})"
         elif self.team:
-            return f"Booking by team {self.team.name} on {self.date} ({self.time_slot})"
-        return f"Booking on {self.date} ({self.time_slot})"
+            return f"Booking by team {self.team.name} on {self.date} ({self.time_label()})"
+        return f"Booking on {self.date} ({self.time_label()})"
+
+# ----------------------
+# Idempotency Key Model
+# ----------------------
+class IdempotencyKey(models.Model):
+    # Stored in the shard of the booking it guards, so it commits in the same transaction
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys', db_constraint=False)
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user')
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.response_status})"
+
+# ----------------------
+# Room Day Occupancy Model
+# ----------------------
+class RoomDayOccupancy(models.Model):
+    """
+    Denormalized occupancy of one room for one day, kept in step with active bookings.
+
+    `slot_counts` holds one byte per BOOKING_GRANULARITY_MINUTES unit since midnight,
+    counting the active bookings covering that unit (0/1 for private and conference
+    rooms, up to the desk seats for shared rooms).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupancy')
+    date = models.DateField()
+    slot_counts = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'room'], name='unique_occupancy_per_room_day')
+        ]
+
+    def __str__(self):
+        return f"Occupancy of room {self.room_id} on {self.date}"
+
+# ----------------------
+# Waitlist Model
+# ----------------------
+class WaitlistEntry(models.Model):
+    """
+    A user's or team's place in the queue for a taken time slot.
+
+    Private and conference waiters queue for a specific room. Shared desk waiters queue
+    by room type and location, since any shared room of the location can seat them.
+    Entries are promoted in creation (id) order and deleted once promoted.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name='waitlist')  # null for shared desks
+    room_type = models.CharField(max_length=20, choices=Room.ROOM_TYPES)
+    # Global rows referenced from a shard, so no database-level constraints
+    location = models.ForeignKey(Location, on_delete=models.DO_NOTHING, null=True, blank=True, db_constraint=False)
+    date = models.DateField()
+    time_slot = models.ForeignKey(Timeslot, on_delete=models.CASCADE, db_constraint=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, db_constraint=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(user__isnull=False) | models.Q(team__isnull=False),
+                name='waitlist_must_have_user_or_team'
+            ),
+            models.CheckConstraint(
+                check=~(models.Q(user__isnull=False) & models.Q(team__isnull=False)),
+                name='waitlist_cannot_have_both_user_and_team'
+            ),
+            models.CheckConstraint(
+                check=models.Q(room__isnull=False) | models.Q(room_type='shared'),
+                name='waitlist_room_required_unless_shared'
+            ),
+        ]
+        indexes = [
+            # Queue heads for a specific room, and for shared desks of a location, in arrival order
+            models.Index(fields=['room', 'date', 'time_slot', 'id'], name='waitlist_room_queue_idx'),
+            models.Index(fields=['room_type', 'location', 'date', 'time_slot', 'id'], name='waitlist_type_queue_idx'),
+        ]
+
+    def __str__(self):
+        waiter = f"team {self.team_id}" if self.team_id else f"user {self.user_id}"
+        target = f"room {self.room_id}" if self.room_id else f"any {self.room_type} room"
+        return f"Waitlist for {target} on {self.date} ({waiter})"
+
+# ----------------------
+# Audit Event Model
+# ----------------------
+class AuditEvent(models.Model):
+    """
+    Append-only record of a booking change, written in batches off the request path.
+
+    References are plain ids rather than foreign keys: bookings and rooms live in
+    location shards, and the history must outlive the rows it describes.
+    """
+    ACTIONS = (
+        ('booking_created', 'Booking created'),
+        ('booking_cancelled', 'Booking cancelled'),
+        ('booking_promoted', 'Booking promoted from waitlist'),
+        ('booking_admin_changed', 'Booking changed by admin'),
+        ('booking_admin_deleted', 'Booking deleted by admin'),
+        ('booking_purged', 'Booking purged with a retired room, timeslot, team or user'),
+    )
+    action = models.CharField(max_length=30, choices=ACTIONS)
+    booking_id = models.UUIDField(null=True, blank=True)
+    room_id = models.IntegerField(null=True, blank=True)
+    location_id = models.IntegerField(null=True, blank=True)
+    user_id = models.IntegerField(null=True, blank=True)  # booking owner
+    team_id = models.IntegerField(null=True, blank=True)
+    actor_id = models.IntegerField(null=True, blank=True)  # who made the change, null for the system
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField()  # when the change happened, not when it was flushed
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['booking_id', 'created_at'], name='audit_booking_idx'),
+            models.Index(fields=['user_id', 'created_at'], name='audit_user_idx'),
+            models.Index(fields=['actor_id', 'created_at'], name='audit_actor_idx'),
+            models.Index(fields=['room_id', 'location_id', 'created_at'], name='audit_room_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.booking_id} at {self.created_at}"
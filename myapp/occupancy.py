@@ -0,0 +1,298 @@
+from collections import defaultdict
+from datetime import time
+
+from django.conf import settings
+from django.db import router, transaction
+
+from .models import Booking, RoomDayOccupancy, Timeslot
+from .occupancy_shm import shared_table, version_of
+
+
+def unit_minutes():
+    """
+    Return the width in minutes of one occupancy unit (settings.BOOKING_GRANULARITY_MINUTES).
+    """
+    return getattr(settings, 'BOOKING_GRANULARITY_MINUTES', 15)
+
+
+def units_per_day():
+    return 24 * 60 // unit_minutes()
+
+
+def unit_range(start_time, end_time):
+    """
+    Return the occupancy units covered by [start_time, end_time).
+
+    Times off the unit grid are widened to whole units, so the result never under-reports.
+    """
+    width = unit_minutes()
+    first = (start_time.hour * 60 + start_time.minute) // width
+    end_minutes = end_time.hour * 60 + end_time.minute + (1 if end_time.second or end_time.microsecond else 0)
+    last = -(-end_minutes // width)
+    return range(first, last)
+
+
+def counts_from_intervals(intervals):
+    """
+    Build a per-unit booking count array from (start_time, end_time) intervals.
+    """
+    counts = bytearray(units_per_day())
+    for start_time, end_time in intervals:
+        for unit in unit_range(start_time, end_time):
+            counts[unit] += 1
+    return counts
+
+
+def peak_load(counts, start_time, end_time):
+    """
+    Return the highest booking count on any unit inside [start_time, end_time).
+    """
+    return max((counts[unit] for unit in unit_range(start_time, end_time)), default=0)
+
+
+def free_intervals_from_counts(counts, opens, closes, seats=1):
+    """
+    Return the maximal [start, end) ranges between `opens` and `closes` whose units
+    hold fewer than `seats` bookings, as (start_time, end_time) tuples.
+    """
+    width = unit_minutes()
+    free = []
+    run_start = None
+    units = unit_range(opens, closes)
+    for unit in units:
+        if counts[unit] < seats:
+            if run_start is None:
+                run_start = unit
+        elif run_start is not None:
+            free.append((run_start, unit))
+            run_start = None
+    if run_start is not None:
+        free.append((run_start, units.stop))
+    return [
+        (max(opens, _unit_time(start, width)), min(closes, _unit_time(end, width)))
+        for start, end in free
+    ]
+
+
+def _unit_time(unit, width):
+    minutes = min(unit * width, 24 * 60 - 1)
+    return time(minutes // 60, minutes % 60)
+
+
+def interval_rows(bookings, *fields, chunk_size=None):
+    """
+    Yield `fields` of each booking in `bookings` followed by its start and end time.
+
+    Bookings made before intervals were stored have only a time slot; their interval is
+    taken from it (timeslots live in the global database, so this cannot be a join).
+    Bookings with neither are skipped. `rebuild_occupancy` backfills such rows.
+    """
+    rows = bookings.values_list(*fields, 'start_time', 'end_time', 'time_slot_id')
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    slot_times = None
+    for *values, start_time, end_time, time_slot_id in rows:
+        if start_time is None or end_time is None:
+            if slot_times is None:
+                slot_times = {
+                    slot_id: (slot_start, slot_end)
+                    for slot_id, slot_start, slot_end in Timeslot.objects.values_list('id', 'start_time', 'end_time')
+                }
+            if time_slot_id not in slot_times:
+                continue
+            start_time, end_time = slot_times[time_slot_id]
+        yield (*values, start_time, end_time)
+
+
+def overlapping_bookings(date, start_time, end_time):
+    """
+    Get active bookings on the given date whose interval overlaps [start_time, end_time).
+
+    Args:
+        date: Date of the booking.
+        start_time: Start of the interval.
+        end_time: End of the interval (exclusive).
+
+    Returns:
+        QuerySet: Overlapping active bookings.
+    """
+    return Booking.objects.filter(
+        date=date,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+        is_active=True
+    )
+
+
+def _active_intervals(room_ids, dates):
+    intervals = defaultdict(list)
+    for room_id, date, start_time, end_time in interval_rows(
+        Booking.objects.filter(room_id__in=room_ids, date__in=dates, is_active=True), 'room_id', 'date'
+    ):
+        intervals[(room_id, date)].append((start_time, end_time))
+    return intervals
+
+
+def load_counts(room_ids, dates):
+    """
+    Read occupancy for every (room, date) pair in one query.
+
+    Pairs without a stored row are computed from active bookings with one extra
+    query, without writing them back.
+
+    Returns:
+        dict: (room_id, date) -> per-unit count array.
+    """
+    room_ids = list(room_ids)
+    dates = list(dates)
+    counts = {
+        (row.room_id, row.date): bytes(row.slot_counts)
+        for row in RoomDayOccupancy.objects.filter(room_id__in=room_ids, date__in=dates)
+        if len(row.slot_counts) == units_per_day()
+    }
+    missing = [(room_id, date) for room_id in room_ids for date in dates if (room_id, date) not in counts]
+    if missing:
+        intervals = _active_intervals({room_id for room_id, _ in missing}, {date for _, date in missing})
+        for key in missing:
+            counts[key] = bytes(counts_from_intervals(intervals.get(key, [])))
+    return counts
+
+
+def load_counts_shared(room_ids, dates):
+    """
+    Like load_counts(), but served from the host's shared memory table where it holds a
+    copy. Only the remaining room-days are read from the database, and they are
+    copied into the table for the other workers.
+
+    Returns:
+        dict: (room_id, date) -> per-unit count array.
+    """
+    table = shared_table(router.db_for_write(RoomDayOccupancy), units_per_day())
+    if table is None:
+        return load_counts(room_ids, dates)
+
+    counts, missing = {}, []
+    for room_id in room_ids:
+        for date in dates:
+            room_counts = table.get(room_id, date)
+            if room_counts is None:
+                missing.append((room_id, date))
+            else:
+                counts[(room_id, date)] = room_counts
+    if not missing:
+        return counts
+
+    missing_rooms, missing_dates = {room_id for room_id, _ in missing}, {date for _, date in missing}
+    fills = {}
+    for room_id, date, slot_counts, updated_at in RoomDayOccupancy.objects.filter(
+        room_id__in=missing_rooms, date__in=missing_dates
+    ).values_list('room_id', 'date', 'slot_counts', 'updated_at'):
+        if len(slot_counts) == units_per_day():
+            fills[(room_id, date)] = (bytes(slot_counts), version_of(updated_at))
+    unstored = [key for key in missing if key not in fills]
+    if unstored:
+        intervals = _active_intervals({room_id for room_id, _ in unstored}, {date for _, date in unstored})
+        for key in unstored:
+            fills[key] = (bytes(counts_from_intervals(intervals.get(key, []))), 0)
+
+    table.put_many((room_id, date, room_counts, version) for (room_id, date), (room_counts, version) in fills.items())
+    for key in missing:
+        counts[key] = fills[key][0]
+    return counts
+
+
+def publish_counts(rows):
+    """
+    Copy freshly written occupancy rows into the host's shared memory table once the
+    current transaction commits.
+
+    Args:
+        rows: RoomDayOccupancy instances as saved.
+    """
+    alias = router.db_for_write(RoomDayOccupancy)
+    table = shared_table(alias, units_per_day())
+    if table is None:
+        return
+    items = [(row.room_id, row.date, bytes(row.slot_counts), version_of(row.updated_at)) for row in rows]
+    transaction.on_commit(lambda: table.put_many(items), using=alias)
+
+
+def forget_shared_rooms(room_ids):
+    """
+    Drop the shared memory copies of deleted rooms' occupancy once the current
+    transaction commits.
+
+    Args:
+        room_ids: Ids of the rooms whose occupancy rows were deleted.
+    """
+    alias = router.db_for_write(RoomDayOccupancy)
+    table = shared_table(alias, units_per_day())
+    if table is None:
+        return
+    room_ids = list(room_ids)
+    transaction.on_commit(lambda: table.forget_rooms(room_ids), using=alias)
+
+
+def rebuild_room_day(room_id, date):
+    """
+    Recompute and store the occupancy of one room-day from its active bookings.
+    """
+    counts = counts_from_intervals(_active_intervals([room_id], [date]).get((room_id, date), []))
+    row, _ = RoomDayOccupancy.objects.update_or_create(
+        room_id=room_id, date=date, defaults={'slot_counts': bytes(counts)}
+    )
+    publish_counts([row])
+    return counts
+
+
+def rebuild_room_days(keys):
+    """
+    Recompute and store the occupancy of many room-days from their active bookings.
+
+    Args:
+        keys: Iterable of (room_id, date) pairs.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    intervals = _active_intervals({room_id for room_id, _ in keys}, {date for _, date in keys})
+    save_counts({key: counts_from_intervals(intervals.get(key, [])) for key in keys})
+
+
+def save_counts(counts):
+    """
+    Store occupancy for many room-days at once, replacing any existing rows.
+
+    Args:
+        counts: dict of (room_id, date) -> per-unit count array.
+    """
+    rows = RoomDayOccupancy.objects.bulk_create(
+        [RoomDayOccupancy(room_id=room_id, date=date, slot_counts=bytes(room_counts))
+         for (room_id, date), room_counts in counts.items()],
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['date', 'room'],
+        update_fields=['slot_counts', 'updated_at'],
+    )
+    publish_counts(rows)
+
+
+def apply_booking(booking, delta):
+    """
+    Add (delta=1) or remove (delta=-1) a booking's interval from its room-day occupancy.
+
+    Must run inside the transaction that creates or cancels the booking, after the
+    booking row has been saved.
+    """
+    row = RoomDayOccupancy.objects.select_for_update().filter(room_id=booking.room_id, date=booking.date).first()
+    if row is None or len(row.slot_counts) != units_per_day():
+        # The saved booking row already reflects the change
+        rebuild_room_day(booking.room_id, booking.date)
+        return
+
+    counts = bytearray(row.slot_counts)
+    for unit in unit_range(booking.start_time, booking.end_time):
+        counts[unit] = max(0, counts[unit] + delta)
+    row.slot_counts = bytes(counts)
+    row.save(update_fields=['slot_counts', 'updated_at'])
+    publish_counts([row])
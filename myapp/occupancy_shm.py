@@ -0,0 +1,242 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OCCUPANCY_SHM = {
+    'ENABLED': True,      # serve availability reads from the shared table when possible
+    'DIRECTORY': None,    # where table files live; defaults to <tmp>/room-booking-occupancy
+    'MAX_ROOMS': 4096,    # rooms per database the table can hold
+    'DAYS': 120,          # days kept per room (a ring indexed by date ordinal)
+    'MAX_AGE': 60,        # seconds a cell is trusted; bounds staleness from writes this host never sees
+}
+
+MAGIC = b'OCCSHM03'
+# magic, units per day, max rooms, days, generation
+HEADER = struct.Struct('<8sIIIxxxxQ')
+ROOM_ID = struct.Struct('<q')
+# date ordinal, version (row updated_at in microseconds), expires at (unix time)
+CELL_HEADER = struct.Struct('<ixxxxqd')
+GENERATION_OFFSET = 24
+EMPTY_ROOM = 0
+READ_RETRIES = 5
+
+
+def shm_setting(name):
+    """
+    Read a single shared occupancy option from settings.OCCUPANCY_SHM.
+    """
+    return getattr(settings, 'OCCUPANCY_SHM', {}).get(name, DEFAULT_OCCUPANCY_SHM[name])
+
+
+def version_of(updated_at):
+    """
+    Order row snapshots by their RoomDayOccupancy.updated_at, in microseconds.
+    """
+    return int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+
+
+class SharedOccupancyTable:
+    """
+    Fixed-layout occupancy array in a memory-mapped file shared by every worker on a host.
+
+    Layout: a header, a room id table (open addressing on room id), then one cell per
+    (room index, day slot). A cell holds the date it describes, the version of the
+    occupancy row it was copied from, when it expires and the per-unit counts. Until
+    it expires (MAX_AGE seconds after it was written) a cell is only replaced by a copy
+    of the same room-day with an equal or newer version; after that it is a miss and
+    any copy read from the database replaces it. The expiry bounds how long a cell can
+    miss writes this host never publishes: other hosts' writes, or a database restored
+    or recreated under the same name.
+
+    Writers serialize on an exclusive flock (plus a thread lock, as flock is per open
+    file) and bump the header generation before and after writing, so readers can
+    copy a cell without locking and retry if a write overlapped (a seqlock).
+    """
+
+    def __init__(self, path, units, max_rooms, days):
+        self.path = Path(path)
+        self.units = units
+        self.max_rooms = max_rooms
+        self.days = days
+        self.cell_size = CELL_HEADER.size + units
+        self.rooms_offset = HEADER.size
+        self.cells_offset = self.rooms_offset + max_rooms * ROOM_ID.size
+        self.size = self.cells_offset + max_rooms * days * self.cell_size
+        self._thread_lock = threading.Lock()
+        self._full_warned = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size != self.size or self._header_mismatch():
+                self._initialize()
+        self._map = mmap.mmap(self._fd, self.size)
+
+    def _header_mismatch(self):
+        header = os.pread(self._fd, HEADER.size, 0)
+        return len(header) < HEADER.size or HEADER.unpack(header)[:4] != (MAGIC, self.units, self.max_rooms, self.days)
+
+    def _initialize(self):
+        # Truncating zero-fills the file: empty room table and cells
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self.size)
+        os.pwrite(self._fd, HEADER.pack(MAGIC, self.units, self.max_rooms, self.days, 0), 0)
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    @property
+    def generation(self):
+        return struct.unpack_from('<Q', self._map, GENERATION_OFFSET)[0]
+
+    def _bump_generation(self):
+        struct.pack_into('<Q', self._map, GENERATION_OFFSET, self.generation + 1)
+
+    def _room_index(self, room_id, insert=False):
+        start = room_id % self.max_rooms
+        for probe in range(self.max_rooms):
+            index = (start + probe) % self.max_rooms
+            stored = ROOM_ID.unpack_from(self._map, self.rooms_offset + index * ROOM_ID.size)[0]
+            if stored == room_id:
+                return index
+            if stored == EMPTY_ROOM:
+                if not insert:
+                    return None
+                ROOM_ID.pack_into(self._map, self.rooms_offset + index * ROOM_ID.size, room_id)
+                return index
+        return None
+
+    def _cell_offset(self, index, date):
+        return self.cells_offset + (index * self.days + date.toordinal() % self.days) * self.cell_size
+
+    def get(self, room_id, date):
+        """
+        Return the counts of one room-day, or None if the table holds no unexpired copy of it.
+        """
+        for _ in range(READ_RETRIES):
+            generation = self.generation
+            if generation % 2:
+                continue
+            index = self._room_index(room_id)
+            if index is None:
+                return None
+            offset = self._cell_offset(index, date)
+            ordinal, _, expires_at = CELL_HEADER.unpack_from(self._map, offset)
+            counts = self._map[offset + CELL_HEADER.size:offset + self.cell_size]
+            if self.generation != generation:
+                continue
+            if ordinal != date.toordinal() or expires_at < time.time():
+                return None
+            return counts
+        return None
+
+    def put_many(self, items):
+        """
+        Store room-day counts, each written only if it is at least as new as the cell's
+        copy or the cell describes another date or has expired. Written cells expire
+        MAX_AGE seconds from now.
+
+        Args:
+            items: Iterable of (room_id, date, counts, version).
+        """
+        now = time.time()
+        expires_at = now + shm_setting('MAX_AGE')
+        with self._locked():
+            self._bump_generation()
+            try:
+                for room_id, date, counts, version in items:
+                    if len(counts) != self.units:
+                        continue
+                    index = self._room_index(room_id, insert=True)
+                    if index is None:
+                        if not self._full_warned:
+                            logger.warning('Shared occupancy table %s is full (%d rooms).', self.path, self.max_rooms)
+                            self._full_warned = True
+                        continue
+                    offset = self._cell_offset(index, date)
+                    ordinal, stored_version, stored_expiry = CELL_HEADER.unpack_from(self._map, offset)
+                    if ordinal == date.toordinal() and version < stored_version and stored_expiry >= now:
+                        continue
+                    CELL_HEADER.pack_into(self._map, offset, date.toordinal(), version, expires_at)
+                    self._map[offset + CELL_HEADER.size:offset + self.cell_size] = bytes(counts)
+            finally:
+                self._bump_generation()
+
+    def forget_rooms(self, room_ids):
+        """
+        Drop every cell of the given rooms. Their ids keep their slot in the room table,
+        as removing them would break the probe chains of other rooms.
+        """
+        with self._locked():
+            self._bump_generation()
+            try:
+                for room_id in room_ids:
+                    index = self._room_index(room_id)
+                    if index is not None:
+                        start = self.cells_offset + index * self.days * self.cell_size
+                        self._map[start:start + self.days * self.cell_size] = bytes(self.days * self.cell_size)
+            finally:
+                self._bump_generation()
+
+    def reset(self):
+        """
+        Forget every room and cell.
+        """
+        with self._locked():
+            self._bump_generation()
+            self._map[self.rooms_offset:self.size] = bytes(self.size - self.rooms_offset)
+            self._bump_generation()
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def shared_table(alias, units):
+    """
+    Return this process's handle on the shared table of a database, or None when the
+    shared table is disabled or unsupported on this platform.
+    """
+    if fcntl is None or not shm_setting('ENABLED'):
+        return None
+    # Key files by database name too, so different databases (e.g. test runs) never share cells
+    database = hashlib.sha1(str(settings.DATABASES[alias]['NAME']).encode()).hexdigest()[:12]
+    directory = Path(shm_setting('DIRECTORY') or Path(tempfile.gettempdir()) / 'room-booking-occupancy')
+    key = (os.getpid(), directory, alias, database, units)
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                try:
+                    table = SharedOccupancyTable(
+                        directory / f'occupancy-{alias}-{database}.bin',
+                        units, shm_setting('MAX_ROOMS'), shm_setting('DAYS'),
+                    )
+                except OSError:
+                    logger.exception('Could not open the shared occupancy table in %s.', directory)
+                    return None
+                _tables[key] = table
+    return table
@@ -0,0 +1,213 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILING = {
+    'SAMPLE_RATE': 0.0,           # fraction of requests profiled at random (0 disables sampling)
+    'HEADER': 'X-Profile',        # requests from admins carrying this header are always profiled
+    'DIRECTORY': None,            # where profiles are written; defaults to BASE_DIR/profiles
+    'MAX_PROFILES': 200,          # oldest profiles are deleted beyond this many
+    'TRACEMALLOC': True,          # also record the top memory allocations
+    'TOP_ALLOCATIONS': 25,        # allocation sites kept per profile
+}
+
+# Each profile is a cProfile dump plus a JSON sidecar with the request, SQL and allocations
+PROFILE_SUFFIX = '.json'
+STATS_SUFFIX = '.prof'
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+# Only one cProfile profiler may be active per process (enforced since Python 3.12)
+_profiler_slot = threading.Lock()
+
+
+def profiling_setting(name):
+    """
+    Read a single profiling option from settings.PROFILING.
+    """
+    return getattr(settings, 'PROFILING', {}).get(name, DEFAULT_PROFILING[name])
+
+
+def profile_directory():
+    return Path(profiling_setting('DIRECTORY') or Path(settings.BASE_DIR) / 'profiles')
+
+
+def _start_tracemalloc():
+    # tracemalloc is process wide; keep it running while any profiled request is in flight
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    return snapshot
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper collecting every executed statement with its duration.
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+def acquire_profiler():
+    """
+    Claim this process's profiler without waiting.
+
+    Returns:
+        bool: False when another request is already being profiled.
+    """
+    return _profiler_slot.acquire(blocking=False)
+
+
+def release_profiler():
+    _profiler_slot.release()
+
+
+class RequestProfile:
+    """
+    Run one request under cProfile (and tracemalloc) while recording its SQL.
+
+    If the profiler cannot be enabled (another profiling tool is active), `active`
+    is False and the request runs unprofiled.
+    """
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.recorder = QueryRecorder()
+        self.trace_memory = profiling_setting('TRACEMALLOC')
+        self.snapshot = None
+        self.duration_ms = None
+        self.active = False
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        try:
+            self.profiler.enable()
+        except Exception:
+            logger.warning('Could not enable the profiler; running the request unprofiled.', exc_info=True)
+            return self
+        self.active = True
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self.recorder))
+        if self.trace_memory:
+            _start_tracemalloc()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.active:
+            return False
+        self.profiler.disable()
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if self.trace_memory:
+            self.snapshot = _stop_tracemalloc()
+        self._stack.close()
+        return False
+
+    def save(self, view_name, request, response):
+        """
+        Write the profile as `<view>/<timestamp>-<id>.prof` plus a JSON sidecar holding
+        the request summary, executed SQL and top allocations, then rotate old profiles.
+
+        Returns:
+            str: Profile id (file stem).
+        """
+        directory = profile_directory() / view_name
+        directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        allocations = []
+        if self.snapshot is not None:
+            for stat in self.snapshot.statistics('lineno')[:profiling_setting('TOP_ALLOCATIONS')]:
+                frame = stat.traceback[0]
+                allocations.append({'location': f'{frame.filename}:{frame.lineno}', 'kb': round(stat.size / 1024, 1), 'count': stat.count})
+
+        self.profiler.dump_stats(directory / f'{profile_id}{STATS_SUFFIX}')
+        with open(directory / f'{profile_id}{PROFILE_SUFFIX}', 'w') as summary:
+            json.dump({
+                'view': view_name,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': self.duration_ms,
+                'queries': self.recorder.queries,
+                'allocations': allocations,
+                'pid': os.getpid(),
+            }, summary)
+        rotate_profiles()
+        return profile_id
+
+
+def rotate_profiles():
+    """
+    Delete the oldest profiles beyond PROFILING['MAX_PROFILES'].
+    """
+    summaries = sorted(profile_directory().glob(f'*/*{PROFILE_SUFFIX}'), key=lambda path: (path.stat().st_mtime, path.name))
+    for summary in summaries[:max(len(summaries) - profiling_setting('MAX_PROFILES'), 0)]:
+        for path in (summary, summary.with_suffix(STATS_SUFFIX)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                # Another worker rotated it first
+                pass
+
+
+def header_requested(request):
+    """
+    Whether the request asks to be profiled and comes from an admin.
+
+    API clients authenticate with a JWT inside the DRF view, after middleware has run,
+    so the token is checked here as well, but only when the header is present.
+    """
+    header = 'HTTP_' + profiling_setting('HEADER').upper().replace('-', '_')
+    if not request.META.get(header):
+        return False
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    return user is not None and getattr(user, 'role', None) == 'admin'
+
+
+def should_profile(request):
+    rate = profiling_setting('SAMPLE_RATE')
+    return (rate > 0 and random.random() < rate) or header_requested(request)
@@ -0,0 +1,197 @@
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .audit import record_event
+from .models import Booking, IdempotencyKey, Room, RoomDayOccupancy, Team, Timeslot, User, WaitlistEntry
+from .occupancy import apply_booking, forget_shared_rooms, rebuild_room_days
+from .routers import shard_databases, use_shard
+from .waitlist import promote_waitlist
+
+DEFAULT_RETIREMENT = {
+    'PURGE_AFTER': 0,       # seconds a retired row is kept (and can still be restored) before it is purged
+    'BATCH_SIZE': 1000,     # dependent rows deleted per transaction
+    'PAUSE': 0.05,          # seconds slept between batches so request writes get the database
+}
+
+
+def retirement_setting(name):
+    """
+    Read a single retirement option from settings.RETIREMENT.
+    """
+    return getattr(settings, 'RETIREMENT', {}).get(name, DEFAULT_RETIREMENT[name])
+
+
+def cancel_retired_bookings(obj):
+    """
+    Cancel the upcoming active bookings of a retired user or team and offer the freed
+    slots to the waitlist, so they stop blocking rooms until purge_retired runs.
+
+    A user's bookings include those of the teams they created, which are retired with
+    them. Past bookings are kept for purge_retired. Rooms and timeslots are ignored:
+    retired rooms are hidden from availability already.
+
+    Args:
+        obj: The User or Team that was just retired.
+
+    Returns:
+        int: Number of bookings cancelled.
+    """
+    if isinstance(obj, User):
+        owned = models.Q(user_id=obj.id) | models.Q(team_id__in=list(obj.created_teams.values_list('id', flat=True)))
+    elif isinstance(obj, Team):
+        owned = models.Q(team_id=obj.id)
+    else:
+        return 0
+
+    cancelled = 0
+    for alias in shard_databases():
+        with use_shard(alias), transaction.atomic(using=alias):
+            bookings = Booking.objects.select_for_update().select_related('room').filter(
+                owned, is_active=True, date__gte=date.today()
+            ).order_by('date', 'start_time')
+            for booking in bookings:
+                booking.is_active = False
+                booking.save()
+                apply_booking(booking, -1)
+                record_event('booking_cancelled', booking, retired=f'{obj._meta.model_name}:{obj.id}')
+                promote_waitlist(booking)
+                cancelled += 1
+    return cancelled
+
+
+class RetirementPurger:
+    """
+    Delete retired rooms, timeslots, teams and users together with the rows that reference them.
+
+    Deleting such a row directly makes Django's deletion collector load every dependent
+    booking and remove them all in one long transaction, and only in the database of the
+    deleted row. Here dependents are removed shard by shard, at most BATCH_SIZE rows per
+    short transaction with a pause in between, so the write lock is never held for long
+    and an interrupted purge simply resumes on the next run. The retired row itself is
+    deleted last, when nothing large is left for the collector to cascade to.
+
+    Args:
+        batch_size: Rows deleted per transaction (default: RETIREMENT["BATCH_SIZE"]).
+        pause: Seconds slept between batches (default: RETIREMENT["PAUSE"]).
+        dry_run: Only count what would be deleted.
+    """
+
+    def __init__(self, batch_size=None, pause=None, dry_run=False):
+        self.batch_size = batch_size or retirement_setting('BATCH_SIZE')
+        self.pause = retirement_setting('PAUSE') if pause is None else pause
+        self.dry_run = dry_run
+        self.counts = {'rooms': 0, 'timeslots': 0, 'teams': 0, 'users': 0, 'bookings': 0}
+
+    def purge(self, older_than=None):
+        """
+        Purge every object retired at least `older_than` ago.
+
+        Args:
+            older_than: timedelta (default: RETIREMENT["PURGE_AFTER"] seconds).
+
+        Returns:
+            dict: Number of rooms, timeslots, teams, users and bookings purged.
+        """
+        if older_than is None:
+            older_than = timedelta(seconds=retirement_setting('PURGE_AFTER'))
+        cutoff = timezone.now() - older_than
+
+        for alias in shard_databases():
+            with use_shard(alias):
+                for room in Room.objects.retired().filter(retired_at__lte=cutoff).order_by('id'):
+                    self.purge_room(room, alias)
+        for slot in Timeslot.objects.retired().filter(retired_at__lte=cutoff).order_by('start_time'):
+            self.purge_timeslot(slot)
+        for team in Team.objects.retired().filter(retired_at__lte=cutoff).order_by('id'):
+            self.purge_team(team)
+        for user in User.objects.retired().filter(retired_at__lte=cutoff).order_by('id'):
+            self.purge_user(user)
+        return self.counts
+
+    def purge_room(self, room, alias):
+        # The room's occupancy rows go with it, so there is nothing to rebuild
+        self.delete_bookings(alias, {'room_id': room.id}, f'room:{room.id}', rebuild=False)
+        self.delete_rows(WaitlistEntry, alias, room_id=room.id)
+        self.delete_rows(RoomDayOccupancy, alias, room_id=room.id)
+        if not self.dry_run:
+            forget_shared_rooms([room.id])
+        self.delete_object(room, 'rooms')
+
+    def purge_timeslot(self, slot):
+        for alias in shard_databases():
+            with use_shard(alias):
+                self.delete_bookings(alias, {'time_slot_id': slot.id}, f'timeslot:{slot.id}')
+                self.delete_rows(WaitlistEntry, alias, time_slot_id=slot.id)
+        self.delete_object(slot, 'timeslots')
+
+    def purge_team(self, team):
+        for alias in shard_databases():
+            with use_shard(alias):
+                self.delete_bookings(alias, {'team_id': team.id}, f'team:{team.id}')
+                self.delete_rows(WaitlistEntry, alias, team_id=team.id)
+        self.delete_object(team, 'teams')
+
+    def purge_user(self, user):
+        # Teams cascade with their creator; purge them first so the collector finds no bookings
+        for team in Team.objects.filter(created_by=user).order_by('id'):
+            self.purge_team(team)
+        for alias in shard_databases():
+            with use_shard(alias):
+                self.delete_bookings(alias, {'user_id': user.id}, f'user:{user.id}')
+                self.delete_rows(WaitlistEntry, alias, user_id=user.id)
+                self.delete_rows(IdempotencyKey, alias, user_id=user.id)
+        self.delete_object(user, 'users')
+
+    def delete_bookings(self, alias, filters, retired, rebuild=True):
+        """
+        Delete the bookings matching `filters` in one shard, batch by batch.
+
+        Each batch is recorded in the audit log and, unless `rebuild` is False, the
+        occupancy of the room-days it freed is recomputed in the same transaction.
+        Must run inside use_shard(alias).
+        """
+        bookings = Booking.objects.using(alias).filter(**filters)
+        if self.dry_run:
+            self.counts['bookings'] += bookings.count()
+            return
+
+        while True:
+            with transaction.atomic(using=alias):
+                batch = list(bookings.select_related('room').order_by()[:self.batch_size])
+                if not batch:
+                    return
+                # Nothing references bookings, so this is a single DELETE by primary key
+                Booking.objects.using(alias).filter(pk__in=[booking.pk for booking in batch]).delete()
+                if rebuild:
+                    rebuild_room_days((booking.room_id, booking.date) for booking in batch if booking.is_active)
+                for booking in batch:
+                    record_event('booking_purged', booking, retired=retired)
+            self.counts['bookings'] += len(batch)
+            if len(batch) < self.batch_size:
+                return
+            time.sleep(self.pause)
+
+    def delete_rows(self, model, alias, **filters):
+        """
+        Delete the rows of `model` matching `filters` in `alias`, batch by batch.
+        """
+        if self.dry_run:
+            return
+        rows = model.objects.using(alias).filter(**filters)
+        while True:
+            with transaction.atomic(using=alias):
+                ids = list(rows.order_by().values_list('pk', flat=True)[:self.batch_size])
+                if ids:
+                    model.objects.using(alias).filter(pk__in=ids).delete()
+            if len(ids) < self.batch_size:
+                return
+            time.sleep(self.pause)
+
+    def delete_object(self, obj, kind):
+        if not self.dry_run:
+            obj.delete()
+        self.counts[kind] += 1
@@ -0,0 +1,173 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+REPLICA_ALIAS = 'replica'
+
+# Models whose rows live in the database of their room's location; everything else is global
+SHARDED_MODELS = {'room', 'booking', 'roomdayoccupancy', 'waitlistentry', 'idempotencykey'}
+
+_use_replica = ContextVar('use_replica', default=False)
+_current_shard = ContextVar('current_shard', default=DEFAULT_DB_ALIAS)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def shard_databases():
+    """
+    Return every database alias that holds sharded (location) data.
+    """
+    return getattr(settings, 'SHARD_DATABASES', [DEFAULT_DB_ALIAS])
+
+
+def is_sharded(model):
+    return model._meta.app_label == 'myapp' and model._meta.model_name in SHARDED_MODELS
+
+
+def enable_replica_reads():
+    """
+    Route reads in the current context to the replica until reset_replica_reads() is called.
+
+    Returns:
+        Token to pass to reset_replica_reads().
+    """
+    return _use_replica.set(True)
+
+
+def reset_replica_reads(token):
+    _use_replica.reset(token)
+
+
+@contextmanager
+def replica_reads():
+    token = enable_replica_reads()
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+def current_shard():
+    """
+    Return the database alias sharded models are routed to in the current context.
+    """
+    return _current_shard.get()
+
+
+def activate_shard(alias):
+    """
+    Route sharded models in the current context to `alias` until reset_shard() is called.
+
+    Returns:
+        Token to pass to reset_shard().
+    """
+    if alias not in shard_databases():
+        raise ValueError(f'"{alias}" is not a shard database.')
+    return _current_shard.set(alias)
+
+
+def reset_shard(token):
+    _current_shard.reset(token)
+
+
+@contextmanager
+def use_shard(alias):
+    token = activate_shard(alias)
+    try:
+        yield
+    finally:
+        reset_shard(token)
+
+
+def shard_atomic(view_method):
+    """
+    Like transaction.atomic, but opens the transaction on the shard active when the
+    decorated method is called rather than on the default database.
+    """
+    @wraps(view_method)
+    def wrapper(*args, **kwargs):
+        with transaction.atomic(using=current_shard()):
+            return view_method(*args, **kwargs)
+
+    return wrapper
+
+
+# Signed cookie carrying a user's read-your-writes pin
+REPLICA_PIN_COOKIE = 'replica_pin'
+
+
+def replica_sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+
+def pin_to_primary(response, user):
+    """
+    Keep the user's reads on the primary for REPLICA_STICKY_SECONDS after a write,
+    so they read their own writes even while the replica lags. The pin travels with
+    the client in a signed, timestamped cookie, so it holds whichever worker or host
+    serves the next request without any shared state.
+    """
+    response.set_signed_cookie(
+        REPLICA_PIN_COOKIE, str(user.pk), salt=REPLICA_PIN_COOKIE,
+        max_age=replica_sticky_seconds(), httponly=True, samesite='Lax',
+    )
+
+
+def is_pinned_to_primary(request):
+    """
+    Check whether the request carries a pin, still within REPLICA_STICKY_SECONDS,
+    for the user making it.
+    """
+    pinned = request.get_signed_cookie(
+        REPLICA_PIN_COOKIE, default=None, salt=REPLICA_PIN_COOKIE, max_age=replica_sticky_seconds()
+    )
+    return pinned is not None and pinned == str(request.user.pk)
+
+
+class ShardedReplicaRouter:
+    """
+    Database router for location shards with a read replica of the primary.
+
+    Sharded models (rooms, bookings, occupancy) go to the database of the instance
+    they relate to, or else the shard activated for the current request. Global
+    models (users, teams, timeslots, locations, ...) always use the primary.
+    Reads inside replica_reads() use the replica instead of the primary.
+    """
+
+    def _shard_for(self, model, hints):
+        instance = hints.get('instance')
+        if instance is not None and is_sharded(type(instance)) and instance._state.db:
+            alias = instance._state.db
+            return DEFAULT_DB_ALIAS if alias == REPLICA_ALIAS else alias
+        return current_shard()
+
+    def _alias_for(self, model, hints):
+        if is_sharded(model):
+            return self._shard_for(model, hints)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        alias = self._alias_for(model, hints)
+        if alias == DEFAULT_DB_ALIAS and _use_replica.get() and replica_configured():
+            return REPLICA_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return self._alias_for(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is populated by replication, never migrated directly
+        if db == REPLICA_ALIAS:
+            return False
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        # Other shards only hold the sharded tables
+        return app_label == 'myapp' and model_name in SHARDED_MODELS
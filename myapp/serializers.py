@@ -1,9 +1,11 @@
 
 from rest_framework import serializers
-from .models import User, Team, Room, Booking, Timeslot
-from rest_framework import serializers
+from .models import User, Team, Room, Booking, Timeslot, Location, WaitlistEntry, AuditEvent
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Max, Min
 from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,18 +13,85 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'email', 'name', 'age', 'gender', 'role']
 
 
+class BulkPrimaryKeyRelatedField(serializers.ManyRelatedField):
+    """
+    Many-to-many primary key field that validates every submitted id with a single query.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        queryset = self.child_relation.get_queryset()
+        pk_field = queryset.model._meta.pk
+        try:
+            pks = {pk_field.to_python(pk) for pk in data}
+        except DjangoValidationError:
+            raise serializers.ValidationError('Incorrect type. Expected a list of pk values.')
+
+        objects = list(queryset.filter(pk__in=pks))
+        missing = pks - {obj.pk for obj in objects}
+        if missing:
+            raise serializers.ValidationError(
+                f'Invalid pk "{sorted(missing, key=str)[0]}" - object does not exist.'
+            )
+        return objects
+
+
 class TeamSerializer(serializers.ModelSerializer):
-    members = serializers.PrimaryKeyRelatedField(many=True, queryset=User.objects.all())
+    members = BulkPrimaryKeyRelatedField(child_relation=serializers.PrimaryKeyRelatedField(queryset=User.objects.active()))
 
     class Meta:
         model = Team
         fields = ['id', 'name', 'created_by', 'members']
         read_only_fields = ['created_by']
 
+class TeamMembersUpdateSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=5000)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=5000)
+
+    def validate(self, attrs):
+        if not attrs.get('add') and not attrs.get('remove'):
+            raise serializers.ValidationError('Provide user ids to "add" and/or "remove".')
+
+        add_ids = set(attrs.get('add', []))
+        existing_ids = set(User.objects.active().filter(pk__in=add_ids).values_list('pk', flat=True))
+        missing = add_ids - existing_ids
+        if missing:
+            raise serializers.ValidationError({'add': f'Users with ids {sorted(missing)} do not exist.'})
+
+        attrs['add'] = add_ids
+        attrs['remove'] = set(attrs.get('remove', []))
+        return attrs
+
+class LocationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Location
+        fields = ['id', 'name', 'code', 'database']
+
+    def validate_database(self, value):
+        if value not in getattr(settings, 'SHARD_DATABASES', ['default']):
+            raise serializers.ValidationError(f'"{value}" is not a configured shard database.')
+        return value
+
 class RoomSerializer(serializers.ModelSerializer):
+    location = serializers.SlugRelatedField(
+        slug_field='code', queryset=Location.objects.all(), required=False, allow_null=True
+    )
+
     class Meta:
         model = Room
-        fields = ['id', 'name', 'room_type', 'capacity']
+        fields = ['id', 'name', 'room_type', 'capacity', 'location']
+
+    def validate_location(self, value):
+        # Rooms cannot move between shards; their bookings live alongside them
+        if self.instance is not None:
+            current = self.instance.location.database if self.instance.location_id else 'default'
+            new = value.database if value else 'default'
+            if current != new:
+                raise serializers.ValidationError('Cannot move a room to a location stored in a different database.')
+        return value
 
 class TimeslotSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,16 +99,33 @@ class TimeslotSerializer(serializers.ModelSerializer):
         fields = ['id', 'start_time', 'end_time']
         read_only_fields = ['id']
 
+def get_location_room(name, location_id):
+    """
+    Look up an active room by name within one location (None for rooms without a
+    location), as room names are only meaningful within their location.
+
+    Raises:
+        ValidationError: If no room, or more than one, has that name there.
+    """
+    try:
+        return Room.objects.active().get(name=name, location_id=location_id)
+    except Room.DoesNotExist:
+        raise serializers.ValidationError({'room': f'Room with name "{name}" does not exist.'})
+    except Room.MultipleObjectsReturned:
+        raise serializers.ValidationError({'room': f'More than one room is named "{name}".'})
+
 class BookingSerializer(serializers.ModelSerializer):
-    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
-    team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), required=False)
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.active(), required=False)
+    team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.active(), required=False)
     room = serializers.CharField(write_only=True)
-    time_slot = serializers.CharField(write_only=True)
+    time_slot = serializers.CharField(write_only=True, required=False)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
 
     class Meta:
         model = Booking
         fields = [
-            'id', 'room', 'date', 'time_slot',
+            'id', 'room', 'date', 'time_slot', 'start_time', 'end_time',
             'user', 'team', 'timestamp', 'is_active'
         ]
         read_only_fields = ['id', 'timestamp', 'is_active']
@@ -48,20 +134,88 @@ class BookingSerializer(serializers.ModelSerializer):
         room_name = attrs.get('room')
         time_slot_name = attrs.get('time_slot')
 
-        try:
-            room = Room.objects.get(name=room_name)
-        except Room.DoesNotExist:
-            raise serializers.ValidationError({'room': f'Room with name "{room_name}" does not exist.'})
+        room = get_location_room(room_name, self.context.get('location_id'))
 
-        try:
-            time_slot = Timeslot.objects.get(name=time_slot_name)
-        except Timeslot.DoesNotExist:
-            raise serializers.ValidationError({'time_slot': f'Timeslot with name "{time_slot_name}" does not exist.'})
+        if time_slot_name:
+            try:
+                time_slot = Timeslot.objects.active().get(name=time_slot_name)
+            except Timeslot.DoesNotExist:
+                raise serializers.ValidationError({'time_slot': f'Timeslot with name "{time_slot_name}" does not exist.'})
+            attrs['start_time'] = time_slot.start_time
+            attrs['end_time'] = time_slot.end_time
+        else:
+            time_slot = None
+            self.validate_interval(attrs.get('start_time'), attrs.get('end_time'))
 
         attrs['room'] = room
         attrs['time_slot'] = time_slot
         return attrs
 
+    def validate_interval(self, start_time, end_time):
+        """
+        Validate a free-form [start_time, end_time) interval against the booking granularity
+        and the opening hours spanned by the timeslot catalog.
+        """
+        if start_time is None or end_time is None:
+            raise serializers.ValidationError('Provide either "time_slot" or both "start_time" and "end_time".')
+        if start_time >= end_time:
+            raise serializers.ValidationError({'end_time': 'end_time must be after start_time.'})
+
+        granularity = getattr(settings, 'BOOKING_GRANULARITY_MINUTES', 15)
+        for name, value in (('start_time', start_time), ('end_time', end_time)):
+            if value.minute % granularity or value.second or value.microsecond:
+                raise serializers.ValidationError({name: f'Times must be on a {granularity}-minute boundary.'})
+
+        opening_hours = Timeslot.objects.active().aggregate(opens=Min('start_time'), closes=Max('end_time'))
+        if opening_hours['opens'] is not None and (
+            start_time < opening_hours['opens'] or end_time > opening_hours['closes']
+        ):
+            raise serializers.ValidationError(
+                f'Bookings must fall between {opening_hours["opens"]:%H:%M} and {opening_hours["closes"]:%H:%M}.'
+            )
+
+class BookingCheckItemSerializer(serializers.Serializer):
+    room = serializers.CharField()
+    date = serializers.DateField()
+    time_slot = serializers.CharField()
+
+class BookingCheckSerializer(serializers.Serializer):
+    # Names are resolved in bulk by the view, so items are only checked for shape here
+    items = BookingCheckItemSerializer(many=True, allow_empty=False, max_length=500)
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    room = serializers.CharField(write_only=True)
+    time_slot = serializers.CharField(write_only=True)
+    team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.active(), required=False)
+
+    class Meta:
+        model = WaitlistEntry
+        fields = ['id', 'room', 'room_type', 'location', 'date', 'time_slot', 'user', 'team', 'created_at']
+        read_only_fields = ['id', 'room_type', 'location', 'user', 'created_at']
+
+    def validate(self, attrs):
+        room_name = attrs.get('room')
+        time_slot_name = attrs.get('time_slot')
+
+        attrs['room'] = get_location_room(room_name, self.context.get('location_id'))
+        try:
+            attrs['time_slot'] = Timeslot.objects.active().get(name=time_slot_name)
+        except Timeslot.DoesNotExist:
+            raise serializers.ValidationError({'time_slot': f'Timeslot with name "{time_slot_name}" does not exist.'})
+        return attrs
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Shared desk entries wait for any shared room of the location
+        data['room'] = instance.room.name if instance.room_id else None
+        data['time_slot'] = str(instance.time_slot_id)
+        return data
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = '__all__'
+
 class BookingListSerializer(serializers.ModelSerializer):
     user = UserSerializer()
     team = TeamSerializer()
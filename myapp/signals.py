@@ -0,0 +1,33 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .membership import invalidate_user_team_ids
+from .models import Team, Timeslot
+from .timeslots import invalidate_timeslot_catalog
+
+
+@receiver(m2m_changed, sender=Team.members.through)
+def team_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate cached team ids of users whose memberships were added, removed or cleared.
+    """
+    if action == 'pre_clear':
+        # clear() does not report which users were affected, so capture them first
+        instance._cleared_member_ids = [instance.pk] if reverse else list(
+            instance.members.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        invalidate_user_team_ids(getattr(instance, '_cleared_member_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        invalidate_user_team_ids([instance.pk] if reverse else pk_set)
+
+
+@receiver(pre_delete, sender=Team)
+def team_deleted(sender, instance, **kwargs):
+    invalidate_user_team_ids(list(instance.members.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=Timeslot)
+@receiver(post_delete, sender=Timeslot)
+def timeslot_changed(sender, **kwargs):
+    invalidate_timeslot_catalog()
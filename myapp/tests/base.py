@@ -0,0 +1,60 @@
+from datetime import date, time, timedelta
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITransactionTestCase
+
+from myapp.models import Booking, Room, Timeslot, User
+from myapp.occupancy import counts_from_intervals, load_counts
+
+
+@override_settings(
+    BOOKING_ADMISSION={'RATE': 1000, 'BURST': 1000},
+    AUDIT_LOG={'ASYNC': False},
+    # The shared memory table outlives test databases; read occupancy from the database
+    OCCUPANCY_SHM={'ENABLED': False},
+)
+class BookingTestCase(APITransactionTestCase):
+    """
+    Base class with nine hourly timeslots, two private rooms, a conference room and a
+    shared desk, and an authenticated user.
+
+    Transaction test cases, as reads go through the replica alias on its own connection
+    and must see committed rows.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.day = date.today() + timedelta(days=30)
+        self.user = self.make_user('alice')
+        self.client.force_authenticate(self.user)
+        for hour in range(9, 18):
+            Timeslot.objects.create(start_time=time(hour), end_time=time(hour + 1))
+        self.private = Room.objects.create(name='Private Room 1', room_type='private', capacity=1)
+        self.other_private = Room.objects.create(name='Private Room 2', room_type='private', capacity=1)
+        self.conference = Room.objects.create(name='Conference Room 1', room_type='conference', capacity=10)
+        self.shared = Room.objects.create(name='Shared Desk 1', room_type='shared', capacity=4)
+
+    def make_user(self, name, **fields):
+        return User.objects.create_user(
+            name=name, email=f'{name}@example.com', password='secret', age=fields.pop('age', 30), gender='f', **fields
+        )
+
+    def book(self, room, slot='9am time slot', **extra):
+        return self.client.post(
+            '/api/v1/bookings/', {'room': room.name, 'date': str(self.day), 'time_slot': slot}, format='json', **extra
+        )
+
+    def assertOccupancyInSync(self, room, day=None):
+        """
+        Check that the stored occupancy of a room-day matches its active bookings.
+        """
+        day = day or self.day
+        intervals = Booking.objects.filter(room=room, date=day, is_active=True).values_list('start_time', 'end_time')
+        stored = load_counts([room.id], [day])[(room.id, day)]
+        self.assertEqual(bytes(stored), bytes(counts_from_intervals(list(intervals))))
+
+    def occupied(self, room, day=None):
+        day = day or self.day
+        return max(load_counts([room.id], [day])[(room.id, day)])
@@ -0,0 +1,35 @@
+from datetime import time, timedelta
+
+from myapp.admin import ApproximateCountPaginator
+from myapp.models import Booking
+
+from .base import BookingTestCase
+
+
+class LargeTableAdminTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        Booking.objects.bulk_create(
+            Booking(
+                room=self.private, date=self.day + timedelta(days=index // 8), user=self.user,
+                start_time=time(9 + index % 8), end_time=time(10 + index % 8), is_active=index > 0,
+            )
+            for index in range(10002)
+        )
+
+    def test_filtered_counts_are_exact(self):
+        paginator = ApproximateCountPaginator(Booking.objects.filter(is_active=True).order_by('date', 'start_time'), 50)
+        self.assertEqual(paginator.count, 10001)
+        self.assertEqual(paginator.num_pages, 201)
+        self.assertEqual(len(paginator.page(201).object_list), 1)
+
+    def test_unfiltered_counts_use_the_estimate(self):
+        paginator = ApproximateCountPaginator(Booking.objects.order_by('date'), 50)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 10002)
+
+    def test_changelist_reaches_the_last_filtered_page(self):
+        self.client.force_login(self.make_user('staff', is_staff=True, is_superuser=True))
+        response = self.client.get('/admin/myapp/booking/', {'is_active__exact': '1', 'p': '201'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
@@ -0,0 +1,64 @@
+from django.utils import timezone
+
+from myapp.audit import AuditLogWriter, audit_log
+from myapp.models import AuditEvent
+
+from .base import BookingTestCase
+
+
+class AuditTrailTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user('admin', role='admin')
+
+    def history(self, **params):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/v1/admin/audit/', params)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [event['action'] for event in response.json()['results']]
+
+    def test_booking_changes_are_recorded(self):
+        written = audit_log.snapshot()['written_inline']
+        booking_id = self.book(self.private).json()['booking_id']
+        # A refused booking rolls back and leaves no event
+        self.assertEqual(self.book(self.private).status_code, 400)
+        self.client.post(f'/api/v1/cancel/{booking_id}/')
+
+        self.assertEqual(self.history(booking=booking_id), ['booking_cancelled', 'booking_created'])
+        self.assertEqual(self.history(user=self.user.id), ['booking_cancelled', 'booking_created'])
+        self.assertEqual(self.history(room=self.other_private.id), [])
+        self.assertEqual(audit_log.snapshot()['written_inline'], written + 2)
+        event = AuditEvent.objects.get(action='booking_created')
+        self.assertEqual((event.actor_id, event.room_id, event.data['is_active']), (self.user.id, self.private.id, True))
+
+    def test_history_is_for_admins_with_valid_filters(self):
+        self.assertEqual(self.client.get('/api/v1/admin/audit/').status_code, 403)
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/audit/').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/v1/admin/audit/', {'booking': 'nope'}).status_code, 400)
+        self.assertEqual(
+            set(self.client.get('/api/v1/admin/metrics/audit/').json()),
+            {'enqueued', 'written', 'written_inline', 'failed', 'queued'},
+        )
+
+
+class AuditLogWriterTests(BookingTestCase):
+    def event(self, **fields):
+        return AuditEvent(action='booking_created', data={}, created_at=timezone.now(), **fields)
+
+    def test_background_writer_drains_in_batches(self):
+        writer = AuditLogWriter()
+        with self.settings(AUDIT_LOG={'ASYNC': True, 'BATCH_SIZE': 2, 'FLUSH_INTERVAL': 0.01}):
+            for index in range(5):
+                writer.enqueue(self.event(room_id=index))
+            writer.flush()
+            self.assertEqual(AuditEvent.objects.count(), 5)
+            self.assertEqual(writer.snapshot()['enqueued'], 5)
+            self.assertEqual(writer.snapshot()['written'], 5)
+
+            writer.shutdown()
+            # Once stopped, events are still written, by the caller
+            writer.enqueue(self.event())
+        self.assertEqual(AuditEvent.objects.count(), 6)
+        self.assertEqual(writer.snapshot()['written_inline'], 1)
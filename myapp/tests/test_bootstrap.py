@@ -0,0 +1,57 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+
+from myapp.models import Location, Room
+
+from .base import BookingTestCase
+
+
+class BootstrapCatalogTests(BookingTestCase):
+    def bootstrap(self, spec, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'catalog.json'
+            path.write_text(json.dumps(spec))
+            out = StringIO()
+            call_command('bootstrap_catalog', str(path), *args, stdout=out)
+        return out.getvalue()
+
+    def test_sync_is_idempotent(self):
+        spec = {'rooms': [{'name': 'Private Room 3', 'room_type': 'private', 'capacity': 1}]}
+        self.assertIn('rooms: 1 created, 0 updated, 0 deleted', self.bootstrap(spec))
+        self.assertIn('rooms: 0 created, 0 updated, 0 deleted', self.bootstrap(spec))
+
+    def test_prune_retires_booked_rows_and_keeps_them_retired(self):
+        self.book(self.private)
+        spec = {
+            'timeslots': [{'start_time': '09:00', 'end_time': '10:00'}],
+            'rooms': [{'name': 'Private Room 2', 'room_type': 'private', 'capacity': 1}],
+        }
+        self.bootstrap(spec, '--prune')
+        self.private.refresh_from_db()
+        self.assertTrue(self.private.is_retired)
+        self.assertEqual(set(Room.objects.values_list('name', flat=True)), {'Private Room 1', 'Private Room 2'})
+
+        spec['rooms'].append({'name': 'Private Room 1', 'room_type': 'private', 'capacity': 1})
+        self.assertIn('rooms: 0 created, 0 updated', self.bootstrap(spec))
+        self.private.refresh_from_db()
+        self.assertTrue(self.private.is_retired)
+
+        self.assertIn('rooms: 0 created, 1 updated', self.bootstrap(spec, '--restore-retired'))
+        self.private.refresh_from_db()
+        self.assertFalse(self.private.is_retired)
+
+    def test_location_database_cannot_change(self):
+        spec = {'locations': [{'code': 'west', 'name': 'West'}]}
+        self.assertIn('locations: 1 created', self.bootstrap(spec))
+        spec['locations'][0]['name'] = 'West Wing'
+        self.assertIn('locations: 0 created, 1 updated', self.bootstrap(spec))
+
+        spec['locations'][0]['database'] = 'north'
+        with self.settings(SHARD_DATABASES=['default', 'north']), self.assertRaisesMessage(CommandError, 'moving a location between databases is not supported'):
+            self.bootstrap(spec)
+        location = Location.objects.get(code='west')
+        self.assertEqual((location.name, location.database), ('West Wing', 'default'))
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .base import BookingTestCase
+
+
+class BookingCheckTests(BookingTestCase):
+    def check(self, items):
+        return self.client.post('/api/v1/bookings/check/', {'items': items}, format='json')
+
+    def item(self, room, slot='9am time slot', day=None):
+        return {'room': room.name, 'date': str(day or self.day), 'time_slot': slot}
+
+    def test_each_item_reports_its_status(self):
+        self.book(self.private)
+        self.book(self.shared)
+        response = self.check([
+            self.item(self.private),
+            self.item(self.private, slot='10am time slot'),
+            self.item(self.shared),
+            {'room': 'Nowhere', 'date': str(self.day), 'time_slot': '9am time slot'},
+            {'room': self.private.name, 'date': str(self.day), 'time_slot': 'Midnight'},
+        ])
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['taken', 'free', 'free', 'invalid', 'invalid'])
+        self.assertEqual(results[2]['remaining'], 3)
+        self.assertEqual(results[3]['error'], 'Room with name "Nowhere" does not exist.')
+
+    def test_queries_do_not_grow_with_the_cart(self):
+        rooms = [self.private, self.other_private, self.conference, self.shared]
+        with CaptureQueriesContext(connection) as small:
+            self.check([self.item(self.private)])
+        cart = [self.item(room, day=self.day + timedelta(days=index % 5)) for index, room in enumerate(rooms * 25)]
+        with CaptureQueriesContext(connection) as large:
+            response = self.check(cart)
+        self.assertEqual(response.json()['count'], 100)
+        self.assertLessEqual(len(large), len(small))
+
+    def test_cart_size_is_bounded(self):
+        self.assertEqual(self.check([]).status_code, 400)
+        self.assertEqual(self.check([self.item(self.private)] * 501).status_code, 400)
+        self.assertEqual(self.check([self.item(self.private)] * 500).status_code, 200)
@@ -0,0 +1,110 @@
+import tempfile
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from myapp.ics import escape_text, fold, param_value, parse_events, unescape_text
+from myapp.models import Booking, RoomDayOccupancy, Team
+
+from .base import BookingTestCase
+
+
+class ICalendarFormatTests(SimpleTestCase):
+    def test_long_lines_fold_at_75_octets_without_splitting_characters(self):
+        line = 'SUMMARY:' + 'Salle de réunion ' * 10
+        folded = fold(line)
+        physical = folded.split('\r\n')[:-1]
+        self.assertTrue(all(len(part.encode('utf-8')) <= 75 for part in physical))
+        self.assertTrue(all(part.startswith(' ') for part in physical[1:]))
+        self.assertEqual(''.join(part[1:] if index else part for index, part in enumerate(physical)), line)
+        self.assertEqual(fold('SUMMARY:short'), 'SUMMARY:short\r\n')
+
+    def test_text_escaping_round_trips(self):
+        value = 'Room 1; 2nd floor, east\\west\nnear the lift'
+        escaped = escape_text(value)
+        self.assertEqual(escaped, 'Room 1\\; 2nd floor\\, east\\\\west\\nnear the lift')
+        self.assertEqual(unescape_text(escaped), value)
+        self.assertEqual(param_value('Ann "A" Lee\n'), '"Ann ^\'A^\' Lee^n"')
+
+    def test_parse_unfolds_lines_and_reads_times_and_parameters(self):
+        source = [
+            'BEGIN:VCALENDAR\r\n',
+            'BEGIN:VEVENT\r\n',
+            'UID:abc@room-booking\r\n',
+            'DTSTART;TZID=Europe/Paris:20300102T100000\r\n',
+            'DTEND:20300102T100000Z\r\n',
+            'LOCATION:Private Room\r\n',
+            '  1\\, east\r\n',
+            'ORGANIZER;CN="Lee: A; B":mailto:lee@example.com\r\n',
+            'X-BOOKING-TEAM-ID:7\r\n',
+            'END:VEVENT\r\n',
+            'BEGIN:VEVENT\r\n',
+            'DTSTART;TZID=Nowhere/City:20300102T100000\r\n',
+            'END:VEVENT\r\n',
+            'END:VCALENDAR\r\n',
+        ]
+        (line, event), (error_line, error) = parse_events(source)
+        self.assertEqual(line, 2)
+        self.assertEqual(event['start'], datetime(2030, 1, 2, 9))
+        self.assertEqual(event['end'], datetime(2030, 1, 2, 10))
+        self.assertEqual(event['location'], 'Private Room 1, east')
+        self.assertEqual(event['organizer_email'], 'lee@example.com')
+        self.assertEqual((event['uid'], event['team_id']), ('abc@room-booking', 7))
+        self.assertEqual(error_line, 10)
+        self.assertIsInstance(error, ValueError)
+
+
+class BookingCalendarTests(BookingTestCase):
+    def export(self, **params):
+        return self.client.get('/api/v1/bookings/export/', params, HTTP_ACCEPT='text/calendar')
+
+    def test_export_streams_the_callers_bookings(self):
+        self.book(self.private)
+        self.book(self.other_private, slot='10am time slot')
+        response = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertIn('ORGANIZER;CN="alice":mailto:alice@example.com\r\n', body)
+
+    def test_errors_are_json_even_for_calendar_clients(self):
+        team = Team.objects.create(name='Team', created_by=self.make_user('lead'))
+        for params, status in (({'start_date': 'garbage'}, 400), ({'team': team.id}, 403), ({'user': 0}, 403)):
+            response = self.export(**params)
+            self.assertEqual(response.status_code, status)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('error', response.json())
+        self.client.force_authenticate(self.make_user('admin', role='admin'))
+        response = self.export(room=0)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Room not found.'})
+
+    @override_settings(TIME_ZONE='Europe/Paris')
+    def test_exported_calendar_imports_back(self):
+        booking_id = self.book(self.private).json()['booking_id']
+        body = b''.join(self.export().streaming_content).decode()
+        self.assertIn(';TZID=Europe/Paris:', body)
+        # Start over from an empty database, as on another deployment
+        Booking.objects.all().delete()
+        RoomDayOccupancy.objects.all().delete()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'bookings.ics'
+            path.write_text(body, encoding='utf-8')
+            out = StringIO()
+            call_command('import_bookings', str(path), stdout=out)
+            self.assertIn('Imported 1 bookings', out.getvalue())
+            out = StringIO()
+            call_command('import_bookings', str(path), stdout=out)
+            self.assertIn('1 already imported', out.getvalue())
+
+        imported = Booking.objects.get()
+        self.assertEqual(str(imported.id), booking_id)
+        self.assertEqual((imported.room, imported.user, str(imported.start_time)), (self.private, self.user, '09:00:00'))
+        self.assertOccupancyInSync(self.private)
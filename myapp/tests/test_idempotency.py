@@ -0,0 +1,41 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from myapp.models import Booking, IdempotencyKey
+
+from .base import BookingTestCase
+
+
+class IdempotencyTests(BookingTestCase):
+    def test_replay_returns_the_first_response(self):
+        first = self.book(self.private, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(first.status_code, 201, first.content)
+        replay = self.book(self.private, HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(self.occupied(self.private), 1)
+
+    def test_key_reuse_for_another_request_is_refused(self):
+        self.assertEqual(self.book(self.private, HTTP_IDEMPOTENCY_KEY='retry-2').status_code, 201)
+        response = self.book(self.private, slot='10am time slot', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    def test_expired_keys_are_purged_and_no_longer_replayed(self):
+        self.assertEqual(self.book(self.private, HTTP_IDEMPOTENCY_KEY='old').status_code, 201)
+        self.assertEqual(self.book(self.other_private, HTTP_IDEMPOTENCY_KEY='new').status_code, 201)
+        IdempotencyKey.objects.filter(key='old').update(created_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('purged 1 idempotency keys', out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+        # The purged key runs the request again, which now finds the room taken
+        self.assertEqual(self.book(self.private, HTTP_IDEMPOTENCY_KEY='old').status_code, 400)
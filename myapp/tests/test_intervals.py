@@ -0,0 +1,51 @@
+from datetime import time
+
+from django.test import SimpleTestCase
+
+from myapp.occupancy import counts_from_intervals, free_intervals_from_counts, peak_load, unit_range
+
+from .base import BookingTestCase
+
+
+class IntervalCountTests(SimpleTestCase):
+    def test_units_cover_whole_granules(self):
+        self.assertEqual(unit_range(time(9), time(10)), range(36, 40))
+        # Off-grid times widen to the units they touch, so conflicts are never missed
+        self.assertEqual(unit_range(time(9, 5), time(9, 50)), range(36, 40))
+
+    def test_peak_load_and_free_intervals(self):
+        counts = counts_from_intervals([(time(9), time(10)), (time(9, 30), time(11))])
+        self.assertEqual(peak_load(counts, time(9), time(12)), 2)
+        self.assertEqual(peak_load(counts, time(11), time(12)), 0)
+        self.assertEqual(free_intervals_from_counts(counts, time(8), time(12)), [(time(8), time(9)), (time(11), time(12))])
+        self.assertEqual(
+            free_intervals_from_counts(counts, time(8), time(12), seats=2),
+            [(time(8), time(9, 30)), (time(10), time(12))],
+        )
+
+
+class VariableDurationBookingTests(BookingTestCase):
+    def book_interval(self, room, start_time, end_time):
+        return self.client.post('/api/v1/bookings/', {
+            'room': room.name, 'date': str(self.day), 'start_time': start_time, 'end_time': end_time,
+        }, format='json')
+
+    def test_intervals_conflict_with_overlapping_slots_only(self):
+        response = self.book_interval(self.private, '09:30', '10:30')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.book(self.private).status_code, 400)
+        self.assertEqual(self.book(self.private, slot='10am time slot').status_code, 400)
+        self.assertEqual(self.book_interval(self.private, '10:30', '11:00').status_code, 201)
+        self.assertEqual(self.book_interval(self.private, '09:00', '09:30').status_code, 201)
+        self.assertOccupancyInSync(self.private)
+
+        response = self.client.get('/api/v1/rooms/available/', {'date': str(self.day), 'room_type': 'private'})
+        rooms = {item['room']['name']: item for item in response.json()['results']}
+        self.assertEqual(rooms[self.private.name]['free_intervals'], [{'start_time': '11:00:00', 'end_time': '18:00:00'}])
+
+    def test_invalid_intervals_are_refused(self):
+        for start_time, end_time in (('10:00', '09:00'), ('09:10', '10:00'), ('08:00', '09:00'), ('17:00', '18:30')):
+            response = self.book_interval(self.private, start_time, end_time)
+            self.assertEqual(response.status_code, 400, (start_time, end_time))
+        response = self.client.post('/api/v1/bookings/', {'room': self.private.name, 'date': str(self.day)}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.forms.models import model_to_dict
+from django.test import RequestFactory
+
+from myapp.models import Booking, RoomDayOccupancy
+from myapp.occupancy import units_per_day
+
+from .base import BookingTestCase
+
+
+class BookingOccupancyTests(BookingTestCase):
+    def test_create_and_cancel_keep_occupancy_in_sync(self):
+        response = self.book(self.private)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.occupied(self.private), 1)
+        self.assertOccupancyInSync(self.private)
+
+        self.assertEqual(self.book(self.private).status_code, 400)
+
+        response = self.client.post(f'/api/v1/cancel/{response.json()["booking_id"]}/')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.occupied(self.private), 0)
+        self.assertOccupancyInSync(self.private)
+        self.assertEqual(self.book(self.private).status_code, 201)
+
+    def admin_change(self, model_admin, request, booking, **changes):
+        """
+        Save `changes` to a booking the way the admin change view does.
+        """
+        form = model_admin.get_form(request, booking, change=True)({**model_to_dict(booking), **changes}, instance=booking)
+        self.assertTrue(form.is_valid(), form.errors)
+        model_admin.save_model(request, form.save(commit=False), form, True)
+
+    def test_admin_edit_and_delete_keep_occupancy_in_sync(self):
+        booking = Booking.objects.get(pk=self.book(self.private).json()['booking_id'])
+        model_admin = site._registry[Booking]
+        request = RequestFactory().post('/')
+        request.user = self.make_user('staff', is_staff=True, is_superuser=True)
+
+        self.admin_change(model_admin, request, booking, room=self.other_private.id)
+        self.assertOccupancyInSync(self.private)
+        self.assertOccupancyInSync(self.other_private)
+        self.assertEqual(self.occupied(self.private), 0)
+        self.assertEqual(self.occupied(self.other_private), 1)
+
+        self.admin_change(model_admin, request, booking, is_active=False)
+        self.assertEqual(self.occupied(self.other_private), 0)
+
+        booking = Booking.objects.get(pk=self.book(self.private).json()['booking_id'])
+        model_admin.delete_queryset(request, Booking.objects.filter(pk=booking.pk))
+        self.assertEqual(self.occupied(self.private), 0)
+        self.assertOccupancyInSync(self.private)
+
+    def test_shared_desk_seats_four(self):
+        users = [self.user] + [self.make_user(f'desk{index}') for index in range(4)]
+        for user in users[:4]:
+            self.client.force_authenticate(user)
+            self.assertEqual(self.book(self.shared).status_code, 201)
+        self.assertEqual(self.occupied(self.shared), 4)
+        self.assertOccupancyInSync(self.shared)
+
+        self.client.force_authenticate(users[0])
+        self.assertEqual(self.book(self.shared, slot='10am time slot').status_code, 201)
+        self.assertEqual(self.book(self.shared, slot='10am time slot').status_code, 400)
+
+        self.client.force_authenticate(users[4])
+        response = self.book(self.shared)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'No available shared desk for the selected slot.')
+
+    def test_rebuild_occupancy_verifies_and_repairs(self):
+        self.book(self.private)
+        RoomDayOccupancy.objects.filter(room=self.private).update(slot_counts=bytes(units_per_day()))
+        Booking.objects.create(room=self.other_private, date=self.day, start_time='10:00', end_time='11:00', user=self.user)
+
+        out = StringIO()
+        call_command('rebuild_occupancy', '--verify', stdout=out)
+        self.assertIn('2 room-days out of sync', out.getvalue())
+        self.assertEqual(self.occupied(self.private), 0)
+
+        out = StringIO()
+        call_command('rebuild_occupancy', stdout=out)
+        self.assertIn('repaired 2 room-days', out.getvalue())
+        self.assertOccupancyInSync(self.private)
+        self.assertOccupancyInSync(self.other_private)
+        self.assertEqual(self.book(self.other_private, slot='10am time slot').status_code, 400)
@@ -0,0 +1,69 @@
+import tempfile
+import time
+from datetime import time as clock_time
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS
+
+from myapp.models import Booking, RoomDayOccupancy
+from myapp.occupancy import counts_from_intervals, load_counts, units_per_day
+from myapp.occupancy_shm import shared_table
+
+from .base import BookingTestCase
+
+
+class SharedOccupancyTableTests(BookingTestCase):
+    """
+    Runs with the shared table enabled, in a directory of its own per test so no cell
+    outlives the test database.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(self.settings(OCCUPANCY_SHM={'ENABLED': True, 'DIRECTORY': directory, 'MAX_AGE': 60}))
+        self.table = shared_table(DEFAULT_DB_ALIAS, units_per_day())
+
+    def free_slots(self, room):
+        response = self.client.get('/api/v1/rooms/available/', {'date': str(self.day)})
+        self.assertEqual(response.status_code, 200, response.content)
+        rooms = {item['room']['name']: item for item in response.json()['results']}
+        return [slot['name'] for slot in rooms[room.name]['available_slots']]
+
+    def later(self, seconds):
+        """
+        Move the table's clock `seconds` ahead.
+        """
+        now = time.time() + seconds
+        return mock.patch('myapp.occupancy_shm.time.time', return_value=now)
+
+    def test_bookings_are_published_to_the_table(self):
+        self.assertIn('9am time slot', self.free_slots(self.private))
+        self.assertEqual(self.book(self.private).status_code, 201)
+        stored = load_counts([self.private.id], [self.day])[(self.private.id, self.day)]
+        self.assertEqual(bytes(self.table.get(self.private.id, self.day)), bytes(stored))
+        self.assertNotIn('9am time slot', self.free_slots(self.private))
+
+    def test_unpublished_writes_show_up_once_the_cell_expires(self):
+        self.assertIn('10am time slot', self.free_slots(self.private))
+        # A booking made on another host: the database changes, this host's table does not
+        Booking.objects.create(room=self.private, date=self.day, start_time='10:00', end_time='11:00', user=self.user)
+        RoomDayOccupancy.objects.update_or_create(room_id=self.private.id, date=self.day, defaults={
+            'slot_counts': counts_from_intervals([(clock_time(10), clock_time(11))]),
+        })
+        self.assertIn('10am time slot', self.free_slots(self.private))
+
+        with self.later(61):
+            self.assertNotIn('10am time slot', self.free_slots(self.private))
+
+    def test_expired_cells_accept_older_versions(self):
+        counts = bytes(units_per_day())
+        self.table.put_many([(self.private.id, self.day, bytes([1]) * units_per_day(), 200)])
+        # A database restored from a backup holds an older row version
+        self.table.put_many([(self.private.id, self.day, counts, 100)])
+        self.assertNotEqual(bytes(self.table.get(self.private.id, self.day)), counts)
+
+        with self.later(61):
+            self.assertIsNone(self.table.get(self.private.id, self.day))
+            self.table.put_many([(self.private.id, self.day, counts, 100)])
+            self.assertEqual(bytes(self.table.get(self.private.id, self.day)), counts)
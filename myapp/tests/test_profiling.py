@@ -0,0 +1,63 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from myapp.management.commands.summarize_profiles import normalize_sql
+
+from .base import BookingTestCase
+
+
+class NormalizeSqlTests(SimpleTestCase):
+    def test_parameter_lists_collapse(self):
+        self.assertEqual(
+            normalize_sql('SELECT *\n  FROM room WHERE id IN (%s, %s, %s)'),
+            'SELECT * FROM room WHERE id IN (%s, ...)',
+        )
+
+
+class SamplingProfilerTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(self.settings(PROFILING={'DIRECTORY': str(self.directory), 'MAX_PROFILES': 2}))
+        self.admin = self.make_user('admin', role='admin')
+        self.client.force_authenticate(None)
+
+    def profiled_get(self, user, path='/api/v1/bookings/list/'):
+        return self.client.get(path, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def test_admin_requests_with_the_header_are_profiled(self):
+        response = self.profiled_get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+        directory = self.directory / 'booking-list'
+        self.assertTrue((directory / f'{profile_id}.prof').exists())
+        with open(directory / f'{profile_id}.json') as summary_file:
+            summary = json.load(summary_file)
+        self.assertEqual((summary['view'], summary['method'], summary['status']), ('booking-list', 'GET', 200))
+        self.assertTrue(summary['queries'])
+
+    def test_other_requests_are_not_profiled(self):
+        self.assertNotIn('X-Profile-Id', self.profiled_get(self.user))
+        self.client.force_authenticate(self.admin)
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/v1/bookings/list/'))
+        self.assertFalse(any(self.directory.iterdir()))
+
+    def test_old_profiles_are_rotated_and_summarized(self):
+        for _ in range(3):
+            self.profiled_get(self.admin)
+        self.assertEqual(len(list(self.directory.glob('*/*.json'))), 2)
+        self.assertEqual(len(list(self.directory.glob('*/*.prof'))), 2)
+
+        output = StringIO()
+        call_command('summarize_profiles', '--match', 'myapp/', stdout=output)
+        self.assertIn('2 profiles', output.getvalue())
+        self.assertIn('booking-list', output.getvalue())
+        self.assertIn('Top SQL by total time', output.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('summarize_profiles', '--view', 'booking-export', stdout=StringIO())
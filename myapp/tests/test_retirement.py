@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.admin.sites import site
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management import call_command
+from django.test import RequestFactory
+
+from myapp.models import Booking, Room, RoomDayOccupancy, Team, User
+
+from .base import BookingTestCase
+
+
+class RetirementTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user('admin', role='admin')
+
+    def test_retired_room_disappears_and_is_purged(self):
+        self.book(self.private)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.delete(f'/api/v1/admin/rooms/{self.private.id}/').status_code, 204)
+
+        response = self.client.get(f'/api/v1/rooms/available/?date={self.day}')
+        self.assertNotIn(self.private.name, [item['room']['name'] for item in response.json()['results']])
+        self.assertEqual(self.book(self.private).status_code, 400)
+
+        call_command('purge_retired', '--pause', '0', stdout=StringIO())
+        self.assertFalse(Room.objects.filter(pk=self.private.pk).exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(RoomDayOccupancy.objects.filter(room_id=self.private.id).exists())
+
+    def test_retiring_a_user_cancels_their_upcoming_bookings(self):
+        lead = self.make_user('lead')
+        team = Team.objects.create(name='Team', created_by=lead)
+        team.members.set([self.make_user(f'member{index}') for index in range(3)])
+        self.client.force_authenticate(lead)
+        self.assertEqual(self.book(self.private).status_code, 201)
+        response = self.client.post('/api/v1/bookings/', {
+            'room': self.conference.name, 'date': str(self.day), 'time_slot': '9am time slot', 'team': team.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.delete(f'/api/v1/admin/users/{lead.id}/').status_code, 204)
+        lead.refresh_from_db()
+        team.refresh_from_db()
+        self.assertFalse(lead.is_active)
+        self.assertTrue(team.is_retired)
+        self.assertFalse(Booking.objects.filter(is_active=True).exists())
+        self.assertEqual(self.occupied(self.private), 0)
+        self.assertEqual(self.occupied(self.conference), 0)
+
+        call_command('purge_retired', '--pause', '0', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=lead.pk).exists())
+        self.assertFalse(Team.objects.filter(pk=team.pk).exists())
+        self.assertFalse(Booking.objects.exists())
+
+    def test_admin_retires_instead_of_deleting(self):
+        model_admin = site._registry[User]
+        request = RequestFactory().post('/')
+        request.user = self.make_user('staff', is_staff=True, is_superuser=True)
+        request._messages = CookieStorage(request)
+        self.assertFalse(model_admin.has_delete_permission(request, self.user))
+        self.assertNotIn('delete_selected', model_admin.get_actions(request))
+
+        self.assertEqual(self.book(self.private).status_code, 201)
+        model_admin.retire_selected(request, User.objects.filter(pk=self.user.pk))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_retired)
+        self.assertFalse(Booking.objects.filter(is_active=True).exists())
+        self.assertEqual(self.occupied(self.private), 0)
@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, router
+
+from myapp import views
+from myapp.models import Booking, User
+from myapp.routers import REPLICA_ALIAS, REPLICA_PIN_COOKIE, replica_reads
+
+from .base import BookingTestCase
+
+
+class ReplicaRoutingTests(BookingTestCase):
+    def test_reads_in_replica_context_use_the_replica(self):
+        self.assertEqual(Booking.objects.all().db, DEFAULT_DB_ALIAS)
+        with replica_reads():
+            self.assertEqual(Booking.objects.all().db, REPLICA_ALIAS)
+            self.assertEqual(User.objects.all().db, REPLICA_ALIAS)
+            self.assertEqual(router.db_for_write(Booking), DEFAULT_DB_ALIAS)
+        self.assertEqual(Booking.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def reads_from_replica(self):
+        with mock.patch.object(views, 'enable_replica_reads', wraps=views.enable_replica_reads) as enable:
+            response = self.client.get('/api/v1/bookings/list/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return enable.called
+
+    def test_write_pins_the_writer_to_the_primary(self):
+        self.assertTrue(self.reads_from_replica())
+
+        response = self.book(self.private)
+        self.assertEqual(response.status_code, 201, response.content)
+        pin = response.cookies[REPLICA_PIN_COOKIE]
+        self.assertEqual(pin['max-age'], 5)
+        self.assertTrue(pin['httponly'])
+        self.assertFalse(self.reads_from_replica())
+
+        # The pin belongs to the writer; another user sending it still reads the replica
+        self.client.force_authenticate(self.make_user('bob'))
+        self.assertTrue(self.reads_from_replica())
+
+    def test_failed_writes_and_tampered_pins_do_not_pin(self):
+        self.book(self.private)
+        self.client.cookies.clear()
+        response = self.book(self.private)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertTrue(self.reads_from_replica())
+
+        self.client.cookies[REPLICA_PIN_COOKIE] = str(self.user.pk)
+        self.assertTrue(self.reads_from_replica())
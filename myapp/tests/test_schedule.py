@@ -0,0 +1,65 @@
+from datetime import time, timedelta
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from myapp.models import Booking, Team, Timeslot
+from myapp.timeslots import timeslot_catalog
+
+from .base import BookingTestCase
+
+
+class ScheduleTests(BookingTestCase):
+    def schedule(self, **params):
+        return self.client.get('/api/v1/bookings/schedule/', {'start_date': str(self.day), **params})
+
+    def test_grid_holds_own_team_and_custom_interval_bookings(self):
+        lead = self.make_user('lead')
+        team = Team.objects.create(name='Team', created_by=lead)
+        team.members.set([self.user, *(self.make_user(f'member{index}') for index in range(2))])
+        self.book(self.private)
+        Booking.objects.create(
+            room=self.conference, date=self.day + timedelta(days=1), start_time=time(9, 30), end_time=time(10, 30),
+            team=team,
+        )
+        Booking.objects.create(
+            room=self.other_private, date=self.day, start_time=time(9), end_time=time(10), user=lead,
+        )
+
+        response = self.schedule()
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(len(data['days']), 7)
+        self.assertEqual(len(data['time_slots']), 9)
+        slots = {slot['name']: slot['id'] for slot in data['time_slots']}
+
+        today = data['days'][str(self.day)]
+        self.assertEqual(list(today), [slots['9am time slot']])
+        self.assertEqual([entry['room']['name'] for entry in today[slots['9am time slot']]], [self.private.name])
+
+        tomorrow = data['days'][str(self.day + timedelta(days=1))]
+        self.assertEqual(set(tomorrow), {slots['9am time slot'], slots['10am time slot']})
+        entry = tomorrow[slots['10am time slot']][0]
+        self.assertEqual(entry['team'], {'id': team.id, 'name': 'Team'})
+        self.assertEqual((entry['start_time'], entry['end_time']), ('09:30:00', '10:30:00'))
+
+    def test_invalid_ranges_are_refused(self):
+        self.assertEqual(self.schedule(start_date='garbage').status_code, 400)
+        self.assertEqual(self.schedule(end_date=str(self.day - timedelta(days=1))).status_code, 400)
+        self.assertEqual(self.schedule(end_date=str(self.day + timedelta(days=31))).status_code, 400)
+
+    def test_catalog_is_read_from_the_database_without_a_shared_cache(self):
+        Timeslot.objects.create(start_time=time(18), end_time=time(19))
+        with self.assertNumQueries(1):
+            self.assertEqual(len(timeslot_catalog()), 10)
+
+    def test_shared_cache_is_invalidated_when_a_timeslot_changes(self):
+        with mock.patch('myapp.timeslots.shared_cache', return_value=LocMemCache('catalog-tests', {})):
+            self.assertEqual(len(timeslot_catalog()), 9)
+            with self.assertNumQueries(0):
+                self.assertEqual(len(timeslot_catalog()), 9)
+
+            slot = Timeslot.objects.create(start_time=time(18), end_time=time(19))
+            self.assertEqual(len(timeslot_catalog()), 10)
+            slot.retire()
+            self.assertEqual(len(timeslot_catalog()), 9)
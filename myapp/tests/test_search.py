@@ -0,0 +1,46 @@
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+
+from .base import BookingTestCase
+
+
+class FreeSlotSearchTests(BookingTestCase):
+    def search(self, **params):
+        response = self.client.get('/api/v1/rooms/search/', {'start_date': str(self.day), **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(item['room']['name'], item['time_slot']['name'], item['remaining']) for item in response.json()['results']]
+
+    def test_earliest_skips_taken_slots_and_small_rooms(self):
+        self.book(self.private)
+        self.assertEqual(self.search(capacity=5, limit=2), [
+            ('Conference Room 1', '9am time slot', 1),
+            ('Conference Room 1', '10am time slot', 1),
+        ])
+        self.assertEqual(self.search(room_type='private', limit=1), [('Private Room 2', '9am time slot', 1)])
+        self.book(self.shared, slot='10am time slot')
+        self.assertEqual(self.search(room_type='shared', start_time='10:00', end_time='11:00'), [
+            ('Shared Desk 1', '10am time slot', 3),
+        ])
+
+    def test_best_fit_prefers_the_smallest_sufficient_room(self):
+        results = self.search(order='best_fit', start_time='09:00', end_time='10:00')
+        self.assertEqual([name for name, _, _ in results], [
+            'Private Room 1', 'Private Room 2', 'Shared Desk 1', 'Conference Room 1',
+        ])
+
+    def test_invalid_parameters_are_refused(self):
+        for params in (
+            {'capacity': 'x'}, {'limit': 0}, {'end_date': 'garbage'}, {'start_time': '25:00'}, {'order': 'random'},
+            {'end_date': str(self.day + timedelta(days=14))},
+        ):
+            response = self.client.get('/api/v1/rooms/search/', {'start_date': str(self.day), **params})
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_past_dates_and_ended_slots_of_today_are_left_out(self):
+        today = date.today()
+        with mock.patch('myapp.views.datetime', wraps=datetime) as clock:
+            clock.now.return_value = datetime.combine(today, time(12, 30))
+            results = self.search(start_date=str(today), room_type='private', limit=1)
+            self.assertEqual(results, [('Private Room 1', '12pm time slot', 1)])
+            yesterday = str(today - timedelta(days=1))
+            self.assertEqual(self.search(start_date=yesterday, end_date=yesterday), [])
@@ -0,0 +1,98 @@
+import unittest
+
+from django.conf import settings
+
+from myapp.models import Booking, IdempotencyKey, Location, Room
+
+from .base import BookingTestCase
+
+
+class LocationRoomLookupTests(BookingTestCase):
+    """
+    Two locations in the default database, each with its own "Private Room 1".
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.west = Location.objects.create(name='West', code='west')
+        self.east = Location.objects.create(name='East', code='east')
+        self.west_room = Room.objects.create(name='Private Room 1', room_type='private', capacity=1, location=self.west)
+        self.east_room = Room.objects.create(name='Private Room 1', room_type='private', capacity=1, location=self.east)
+
+    def book_at(self, room_name, location=None):
+        data = {'room': room_name, 'date': str(self.day), 'time_slot': '9am time slot'}
+        if location:
+            data['location'] = location
+        return self.client.post('/api/v1/bookings/', data, format='json')
+
+    def test_booking_uses_the_room_of_the_requested_location(self):
+        response = self.book_at('Private Room 1', 'west')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Booking.objects.get(pk=response.json()['booking_id']).room, self.west_room)
+
+        response = self.book_at('Private Room 1', 'east')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Booking.objects.get(pk=response.json()['booking_id']).room, self.east_room)
+
+        response = self.book_at('Private Room 1')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Booking.objects.get(pk=response.json()['booking_id']).room, self.private)
+
+    def test_rooms_of_other_locations_are_not_found(self):
+        response = self.book_at('Private Room 2', 'west')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['room'], ['Room with name "Private Room 2" does not exist.'])
+        self.assertFalse(Booking.objects.exists())
+
+    def test_waitlist_uses_the_room_of_the_requested_location(self):
+        self.assertEqual(self.book_at('Private Room 1', 'west').status_code, 201)
+        self.client.force_authenticate(self.make_user('bob'))
+        data = {'room': 'Private Room 1', 'date': str(self.day), 'time_slot': '9am time slot'}
+        response = self.client.post('/api/v1/waitlist/', {**data, 'location': 'west'}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['location'], self.west.id)
+        # The east room with the same name is free, so there is nothing to wait for
+        response = self.client.post('/api/v1/waitlist/', {**data, 'location': 'east'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_names_within_a_location_are_refused(self):
+        Room.objects.create(name='Private Room 1', room_type='private', capacity=1, location=self.west)
+        response = self.book_at('Private Room 1', 'west')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['room'], ['More than one room is named "Private Room 1".'])
+
+
+@unittest.skipUnless('north' in settings.DATABASES, 'needs LOCATION_SHARDS=north')
+class ShardRoutingTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.north = Location.objects.create(name='North', code='north', database='north')
+        self.north_room = Room.objects.using('north').create(
+            name='Private Room 1', room_type='private', capacity=1, location=self.north
+        )
+
+    def test_bookings_and_idempotency_keys_live_in_the_location_shard(self):
+        response = self.client.post('/api/v1/bookings/', {
+            'room': 'Private Room 1', 'date': str(self.day), 'time_slot': '9am time slot', 'location': 'north',
+        }, format='json', HTTP_IDEMPOTENCY_KEY='north-1')
+        self.assertEqual(response.status_code, 201, response.content)
+        booking_id = response.json()['booking_id']
+        self.assertTrue(Booking.objects.using('north').filter(pk=booking_id).exists())
+        self.assertFalse(Booking.objects.using('default').filter(pk=booking_id).exists())
+        self.assertTrue(IdempotencyKey.objects.using('north').filter(key='north-1').exists())
+        self.assertFalse(IdempotencyKey.objects.using('default').exists())
+
+        # Cancellation finds the shard on its own
+        self.assertEqual(self.client.post(f'/api/v1/cancel/{booking_id}/').status_code, 200)
+        self.assertFalse(Booking.objects.using('north').get(pk=booking_id).is_active)
+
+    def test_admin_booking_list_merges_shards(self):
+        self.book(self.private)
+        self.client.post('/api/v1/bookings/', {
+            'room': 'Private Room 1', 'date': str(self.day), 'time_slot': '10am time slot', 'location': 'north',
+        }, format='json')
+        self.client.force_authenticate(self.make_user('admin', role='admin'))
+        response = self.client.get('/api/v1/admin/bookings/', {'date': str(self.day)})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['count'], 2)
+        self.assertEqual(self.client.get('/api/v1/admin/bookings/', {'date': 'garbage'}).status_code, 400)
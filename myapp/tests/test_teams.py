@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from myapp.membership import user_team_ids
+from myapp.models import Team
+
+from .base import BookingTestCase
+
+
+class TeamMembershipTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lead = self.make_user('lead')
+        self.team = Team.objects.create(name='Team', created_by=self.lead)
+        self.others = [self.make_user(f'member{index}') for index in range(3)]
+
+    def update_members(self, **data):
+        return self.client.post(f'/api/v1/teams/{self.team.id}/members/', data, format='json')
+
+    def test_join_is_idempotent(self):
+        response = self.client.post(f'/api/v1/teams/{self.team.id}/join/')
+        self.assertEqual(response.json(), {'message': 'User added to the team.'})
+        response = self.client.post(f'/api/v1/teams/{self.team.id}/join/')
+        self.assertEqual(response.json(), {'message': 'User already a member of the team.'})
+        self.assertEqual(list(self.team.members.all()), [self.user])
+        self.assertEqual(self.client.post('/api/v1/teams/0/join/').status_code, 404)
+
+    def test_lead_adds_and_removes_members_in_bulk(self):
+        self.client.force_authenticate(self.lead)
+        ids = [user.id for user in self.others]
+        self.assertEqual(self.update_members(add=ids).json(), {'added': 3, 'removed': 0})
+        self.assertEqual(self.update_members(add=ids[:2], remove=ids[2:]).json(), {'added': 0, 'removed': 1})
+        self.assertEqual(set(self.team.members.values_list('id', flat=True)), set(ids[:2]))
+
+        response = self.update_members(add=[0])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.update_members().status_code, 400)
+
+    def test_only_lead_or_admin_manage_members(self):
+        self.assertEqual(self.update_members(add=[self.user.id]).status_code, 403)
+        self.client.force_authenticate(self.make_user('admin', role='admin'))
+        self.assertEqual(self.update_members(add=[self.user.id]).json(), {'added': 1, 'removed': 0})
+
+    def test_bulk_changes_invalidate_cached_team_ids(self):
+        self.client.force_authenticate(self.lead)
+        with mock.patch('myapp.membership.shared_cache', return_value=LocMemCache('team-members-tests', {})):
+            self.assertEqual(user_team_ids(self.others[0]), [])
+            self.update_members(add=[self.others[0].id])
+            self.assertEqual(user_team_ids(self.others[0]), [self.team.id])
+            self.update_members(remove=[self.others[0].id])
+            self.assertEqual(user_team_ids(self.others[0]), [])
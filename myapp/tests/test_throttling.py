@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from myapp.throttling import BookingWriteThrottle, TokenBucket, _get_write_slots, admission_metrics
+
+from .base import BookingTestCase
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_bucket_refills_at_its_rate(self):
+        with mock.patch('myapp.throttling.time.monotonic', return_value=100.0) as clock:
+            bucket = TokenBucket(rate=2, capacity=2)
+            self.assertEqual([bucket.consume(), bucket.consume()], [0, 0])
+            self.assertEqual(bucket.consume(), 0.5)
+            clock.return_value = 100.25
+            self.assertEqual(bucket.consume(), 0.25)
+            clock.return_value = 100.5
+            self.assertEqual(bucket.consume(), 0)
+
+
+class AdmissionControlTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        BookingWriteThrottle._buckets.clear()
+        admission_metrics.reset()
+
+    def test_each_user_has_a_burst_of_writes(self):
+        with self.settings(BOOKING_ADMISSION={'RATE': 0.01, 'BURST': 2}):
+            self.assertEqual(self.book(self.private).status_code, 201)
+            self.assertEqual(self.book(self.other_private).status_code, 201)
+            response = self.book(self.conference)
+            self.assertEqual(response.status_code, 429)
+            self.assertGreater(int(response['Retry-After']), 0)
+
+            self.client.force_authenticate(self.make_user('bob'))
+            self.assertEqual(self.book(self.shared).status_code, 201)
+        self.assertEqual(admission_metrics.snapshot()['rejected_rate_limit'], 1)
+
+    def test_writes_beyond_the_concurrency_limit_fail_fast(self):
+        with self.settings(BOOKING_ADMISSION={
+            'RATE': 1000, 'BURST': 1000, 'MAX_CONCURRENT_WRITES': 1, 'ACQUIRE_TIMEOUT': 0, 'RETRY_AFTER': 3,
+        }):
+            slots = _get_write_slots()
+            # Another request holds the only write slot
+            slots.acquire()
+            try:
+                response = self.book(self.private)
+            finally:
+                slots.release()
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '3')
+            self.assertEqual(self.book(self.private).status_code, 201)
+
+        self.client.force_authenticate(self.make_user('admin', role='admin'))
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/admission/').json(), {
+            'admitted': 1, 'rejected_rate_limit': 0, 'rejected_concurrency': 1,
+        })
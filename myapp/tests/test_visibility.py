@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from myapp.membership import user_team_ids
+from myapp.models import Team
+
+from .base import BookingTestCase
+
+
+class VisibilityTests(BookingTestCase):
+    def setUp(self):
+        super().setUp()
+        self.lead = self.make_user('lead')
+        self.team = Team.objects.create(name='Team', created_by=self.lead)
+        self.team.members.set([self.make_user(f'member{index}') for index in range(3)])
+        self.client.force_authenticate(self.lead)
+        response = self.client.post('/api/v1/bookings/', {
+            'room': self.conference.name, 'date': str(self.day), 'time_slot': '9am time slot', 'team': self.team.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.client.force_authenticate(self.user)
+
+    def visible_bookings(self):
+        return [item['room']['name'] for item in self.client.get('/api/v1/bookings/list/').json()['results']]
+
+    def visible_teams(self):
+        return [item['id'] for item in self.client.get('/api/v1/teams/').json()['results']]
+
+    def test_members_see_team_bookings_and_teams(self):
+        self.book(self.private)
+        self.assertEqual(self.visible_bookings(), [self.private.name])
+        self.assertEqual(self.visible_teams(), [])
+
+        self.team.members.add(self.user)
+        self.assertEqual(sorted(self.visible_bookings()), sorted([self.private.name, self.conference.name]))
+        self.assertEqual(self.visible_teams(), [self.team.id])
+
+        self.team.members.remove(self.user)
+        self.assertEqual(self.visible_bookings(), [self.private.name])
+
+    def test_team_ids_are_read_from_the_database_without_a_shared_cache(self):
+        with self.assertNumQueries(1):
+            user_team_ids(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(user_team_ids(self.user), [])
+
+    def test_shared_cache_is_invalidated_on_membership_change(self):
+        with mock.patch('myapp.membership.shared_cache', return_value=LocMemCache('team-ids-tests', {})):
+            self.assertEqual(user_team_ids(self.user), [])
+            with self.assertNumQueries(0):
+                self.assertEqual(user_team_ids(self.user), [])
+
+            self.team.members.add(self.user)
+            self.assertEqual(user_team_ids(self.user), [self.team.id])
+            self.team.members.clear()
+            self.assertEqual(user_team_ids(self.user), [])
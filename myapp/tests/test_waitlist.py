@@ -0,0 +1,78 @@
+from myapp.models import Booking, Location, Room, WaitlistEntry
+
+from .base import BookingTestCase
+
+
+class WaitlistTests(BookingTestCase):
+    def join(self, room, slot='9am time slot', **extra):
+        return self.client.post(
+            '/api/v1/waitlist/', {'room': room.name, 'date': str(self.day), 'time_slot': slot, **extra}, format='json'
+        )
+
+    def fill_shared_desk(self):
+        desk_users = [self.make_user(f'desk{index}') for index in range(4)]
+        bookings = []
+        for user in desk_users:
+            self.client.force_authenticate(user)
+            bookings.append(self.book(self.shared).json()['booking_id'])
+        return desk_users, bookings
+
+    def test_cancellation_promotes_first_waiter(self):
+        booking_id = self.book(self.private).json()['booking_id']
+        waiters = [self.make_user('bob'), self.make_user('carol')]
+        for waiter in waiters:
+            self.client.force_authenticate(waiter)
+            response = self.join(self.private)
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['position'], 2)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(f'/api/v1/cancel/{booking_id}/').status_code, 200)
+
+        promoted = Booking.objects.get(room=self.private, is_active=True)
+        self.assertEqual(promoted.user, waiters[0])
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user_id', flat=True)), [waiters[1].id])
+        self.assertEqual(self.occupied(self.private), 1)
+        self.assertOccupancyInSync(self.private)
+
+    def test_free_slots_and_repeat_entries_are_refused(self):
+        self.assertEqual(self.join(self.private).status_code, 400)
+        self.book(self.private)
+        self.client.force_authenticate(self.make_user('bob'))
+        self.assertEqual(self.join(self.private).status_code, 201)
+        self.assertEqual(self.join(self.private).status_code, 400)
+
+    def test_shared_desk_cancellation_promotes_across_shared_rooms(self):
+        second_desk = Room.objects.create(name='Shared Desk 2', room_type='shared', capacity=4)
+        desk_users = [self.make_user(f'desk{index}') for index in range(8)]
+        bookings = []
+        for user in desk_users:
+            self.client.force_authenticate(user)
+            bookings.append(self.book(self.shared).json()['booking_id'])
+        self.assertEqual(self.occupied(second_desk), 4)
+
+        waiter = self.make_user('waiter')
+        self.client.force_authenticate(waiter)
+        response = self.join(self.shared)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsNone(response.json()['room'])
+
+        # A seat frees up on the second desk, not the one the waiter asked for
+        cancelled = Booking.objects.get(pk=bookings[-1])
+        self.assertEqual(cancelled.room, second_desk)
+        self.client.force_authenticate(desk_users[-1])
+        self.assertEqual(self.client.post(f'/api/v1/cancel/{cancelled.pk}/').status_code, 200)
+        promoted = Booking.objects.get(user=waiter, is_active=True)
+        self.assertEqual(promoted.room, second_desk)
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_shared_desk_capacity_is_checked_within_the_location(self):
+        west = Location.objects.create(name='West', code='west')
+        Room.objects.create(name='West Desk', room_type='shared', capacity=4, location=west)
+        self.fill_shared_desk()
+
+        # The west desk is free, but it cannot seat a waiter for desks without a location
+        self.client.force_authenticate(self.make_user('waiter'))
+        response = self.join(self.shared)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsNone(response.json()['location'])
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_ADMISSION = {
+    'RATE': 1.0,                  # tokens refilled per second for each user
+    'BURST': 5,                   # bucket size, i.e. writes a user can fire back to back
+    'MAX_CONCURRENT_WRITES': 4,   # write transactions allowed in flight per process
+    'ACQUIRE_TIMEOUT': 0.05,      # seconds to wait for a write slot before rejecting
+    'RETRY_AFTER': 1,             # Retry-After seconds when the write slots are exhausted
+    'MAX_TRACKED_USERS': 10000,   # token buckets kept in memory (least recently used evicted)
+}
+
+
+def admission_setting(name):
+    """
+    Read a single admission control option from settings.BOOKING_ADMISSION.
+    """
+    return getattr(settings, 'BOOKING_ADMISSION', {}).get(name, DEFAULT_ADMISSION[name])
+
+
+class AdmissionMetrics:
+    """
+    Thread-safe counters of admitted and rejected booking writes for this process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {'admitted': 0, 'rejected_rate_limit': 0, 'rejected_concurrency': 0}
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+admission_metrics = AdmissionMetrics()
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at `rate` tokens per second.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self):
+        """
+        Take one token if available.
+
+        Returns:
+            float: 0 when admitted, otherwise seconds until a token becomes available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class BookingWriteThrottle(BaseThrottle):
+    """
+    Per-user token bucket for booking writes, kept in process memory.
+    """
+    _buckets = OrderedDict()
+    _lock = threading.Lock()
+
+    def allow_request(self, request, view):
+        rate = admission_setting('RATE')
+        burst = admission_setting('BURST')
+        key = request.user.pk if request.user and request.user.is_authenticated else self.get_ident(request)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket.rate != rate or bucket.capacity != burst:
+                bucket = TokenBucket(rate, burst)
+                self._buckets[key] = bucket
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > admission_setting('MAX_TRACKED_USERS'):
+                self._buckets.popitem(last=False)
+            self._wait = bucket.consume()
+
+        if self._wait:
+            admission_metrics.incr('rejected_rate_limit')
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+_write_slots = None
+_write_slots_limit = None
+_write_slots_lock = threading.Lock()
+
+
+def _get_write_slots():
+    global _write_slots, _write_slots_limit
+    limit = admission_setting('MAX_CONCURRENT_WRITES')
+    with _write_slots_lock:
+        if _write_slots is None or _write_slots_limit != limit:
+            _write_slots = threading.BoundedSemaphore(limit)
+            _write_slots_limit = limit
+        return _write_slots
+
+
+def limit_concurrent_writes(view_method):
+    """
+    Decorator that caps the number of booking write transactions running at once.
+
+    Requests that cannot get a slot within ACQUIRE_TIMEOUT fail fast with 429 and a
+    Retry-After header instead of queueing on the database write lock.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        slots = _get_write_slots()
+        if not slots.acquire(timeout=admission_setting('ACQUIRE_TIMEOUT')):
+            admission_metrics.incr('rejected_concurrency')
+            raise Throttled(wait=admission_setting('RETRY_AFTER'))
+        admission_metrics.incr('admitted')
+        try:
+            return view_method(self, request, *args, **kwargs)
+        finally:
+            slots.release()
+
+    return wrapper
+
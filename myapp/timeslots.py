@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import transaction
+
+from .caching import shared_cache
+from .models import Timeslot
+
+TIMESLOT_CATALOG_KEY = 'timeslot-catalog'
+
+
+def timeslot_catalog():
+    """
+    Return the catalog of active (not retired) timeslots as a list of dicts ordered by start time.
+
+    The catalog changes rarely, so with a shared cache (see shared_cache) it is cached
+    (settings.TIMESLOT_CATALOG_CACHE_TTL) and invalidated for every worker whenever a
+    timeslot is saved, retired or deleted; otherwise it is read from the database.
+    Code that writes timeslots without save() must call invalidate_timeslot_catalog().
+
+    Returns:
+        list: Dicts with id, name, start_time and end_time.
+    """
+    catalog_cache = shared_cache()
+    catalog = catalog_cache.get(TIMESLOT_CATALOG_KEY) if catalog_cache else None
+    if catalog is None:
+        catalog = list(
+            Timeslot.objects.active().order_by('start_time').values('id', 'name', 'start_time', 'end_time')
+        )
+        if catalog_cache:
+            catalog_cache.set(TIMESLOT_CATALOG_KEY, catalog, timeout=getattr(settings, 'TIMESLOT_CATALOG_CACHE_TTL', 3600))
+    return catalog
+
+
+def invalidate_timeslot_catalog():
+    """
+    Drop the cached catalog, now and again once the current transaction commits.
+    """
+    catalog_cache = shared_cache()
+    if catalog_cache:
+        catalog_cache.delete(TIMESLOT_CATALOG_KEY)
+        transaction.on_commit(lambda: catalog_cache.delete(TIMESLOT_CATALOG_KEY))
@@ -9,9 +9,15 @@ urlpatterns = [
 
     path('bookings/', BookingCreateView.as_view(), name='create-booking'),
     path('cancel/<uuid:booking_id>/', BookingCancelView.as_view(), name='cancel-booking'),
+    path('bookings/check/', BookingCheckView.as_view(), name='booking-check'),
     path('bookings/list/', BookingListView.as_view(), name='booking-list'),
+    path('bookings/export/', BookingExportView.as_view(), name='booking-export'),
+    path('waitlist/', WaitlistListCreateView.as_view(), name='waitlist-list-create'),
+    path('waitlist/<int:id>/', WaitlistEntryDestroyView.as_view(), name='waitlist-leave'),
+    path('bookings/schedule/', BookingScheduleView.as_view(), name='booking-schedule'),
     
     path('rooms/available/', AvailableRoomsAndSlotsByDateView.as_view(), name='available-rooms-slots'),
+    path('rooms/search/', FreeSlotSearchView.as_view(), name='free-slot-search'),
 
     # Team CRUD APIs
     path('teams/', TeamListCreateView.as_view(), name='team-list-create'),
@@ -20,9 +26,19 @@ urlpatterns = [
     # Join team API
     path('teams/<int:team_id>/join/', JoinTeamView.as_view(), name='join-team'),
 
+    # Bulk add/remove team members
+    path('teams/<int:team_id>/members/', TeamMembersBulkUpdateView.as_view(), name='team-members-bulk-update'),
+
     # Admin add user to team
     path('admin/add-user-to-team/', AdminAddUserToTeamView.as_view(), name='admin-add-user-to-team'),
 
+    # Admin booking admission control metrics
+    path('admin/metrics/admission/', AdmissionMetricsView.as_view(), name='admin-admission-metrics'),
+    path('admin/metrics/audit/', AuditMetricsView.as_view(), name='admin-audit-metrics'),
+
+    # Admin booking audit history
+    path('admin/audit/', AuditEventListView.as_view(), name='admin-audit-event-list'),
+
     # Admin CRUD for User
     path('admin/users/', UserListCreateView.as_view(), name='admin-user-list-create'),
     path('admin/users/<int:id>/', UserRetrieveUpdateDestroyView.as_view(), name='admin-user-detail'),
@@ -31,7 +47,13 @@ urlpatterns = [
     path('admin/rooms/', RoomListCreateView.as_view(), name='admin-room-list-create'),
     path('admin/rooms/<int:id>/', RoomRetrieveUpdateDestroyView.as_view(), name='admin-room-detail'),
 
+    # Admin CRUD for Location
+    path('admin/locations/', LocationListCreateView.as_view(), name='admin-location-list-create'),
+
+    # Admin booking list across all location shards
+    path('admin/bookings/', AdminBookingListView.as_view(), name='admin-booking-list'),
+
     # Admin CRUD for Timeslot
     path('admin/timeslots/', TimeslotListCreateView.as_view(), name='admin-timeslot-list-create'),
-    path('admin/timeslots/<int:id>/', TimeslotRetrieveUpdateDestroyView.as_view(), name='admin-timeslot-detail'),
+    path('admin/timeslots/<uuid:id>/', TimeslotRetrieveUpdateDestroyView.as_view(), name='admin-timeslot-detail'),
 ]
@@ -1,15 +1,38 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny, BasePermission
+from rest_framework.permissions import IsAuthenticated, AllowAny, BasePermission, SAFE_METHODS
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.db import transaction
 from rest_framework.views import APIView
 from .models import *
 from .serializers import *
-from rest_framework import generics
-from datetime import date as dt_date
+from .audit import audit_log, record_event
+from .ics import ICalendarRenderer, booking_event, calendar_stream
+from .idempotency import idempotent
+from .membership import invalidate_user_team_ids, is_team_member, team_seat_count, user_team_ids
+from .timeslots import timeslot_catalog
+from .routers import (
+    activate_shard, current_shard, enable_replica_reads, is_pinned_to_primary, reset_replica_reads,
+    reset_shard, shard_atomic, shard_databases, use_shard,
+)
+from .occupancy import (
+    apply_booking, free_intervals_from_counts, load_counts, load_counts_shared, overlapping_bookings, peak_load,
+)
+from .retirement import cancel_retired_bookings
+from .throttling import BookingWriteThrottle, admission_metrics, limit_concurrent_writes
+from .waitlist import promote_waitlist, waitlist_queue
+import uuid
+from datetime import date as dt_date, datetime, timedelta
+from heapq import merge
+from itertools import groupby, islice
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.utils.dateparse import parse_date, parse_time
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from django.http import StreamingHttpResponse
 
 
 class SignupView(APIView):
@@ -42,50 +65,119 @@ class IsAdmin(BasePermission):
         """
         return request.user and request.user.role == 'admin'
 
-# Utility for conflict check
-def has_booking_conflict(room, date, time_slot):
+class ReplicaReadMixin:
+    """
+    Mixin for read-mostly views: safe (GET/HEAD/OPTIONS) requests read from the replica
+    database unless the user wrote recently. Writes always use the primary.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned_to_primary(request):
+            self._replica_token = enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            reset_replica_reads(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+def resolve_location(code):
     """
-    Check if there is an active booking conflict for the given room, date, and time slot.
+    Resolve a location code to its id and the database alias holding its rooms and bookings.
 
     Args:
-        room: Room instance to check.
-        date: Date of the booking.
-        time_slot: Time slot of the booking.
+        code: Location code, or None/empty for rooms without a location.
 
     Returns:
-        bool: True if a conflict exists, False otherwise.
+        tuple: (location id or None, database alias).
+    """
+    if not code:
+        return None, DEFAULT_DB_ALIAS
+    cache_key = f'location:{code}'
+    location = cache.get(cache_key)
+    if location is None:
+        location = Location.objects.filter(code=code).values_list('id', 'database').first()
+        if location is None:
+            raise ValidationError({"location": f'Location "{code}" does not exist.'})
+        cache.set(cache_key, location, timeout=60)
+    return tuple(location)
+
+class LocationShardMixin:
     """
-    return Booking.objects.filter(
-        room=room,
-        date=date,
-        time_slot=time_slot,
-        is_active=True
-    ).exists()
+    Mixin that routes rooms and bookings to the shard of the requested location
+    (`location` query parameter or request field) for the duration of the request.
+    """
+    location_id = None
 
-# Utility to calculate headcount
-def team_seat_count(team):
+    def get_location(self, request, *args, **kwargs):
+        """
+        Returns:
+            tuple: (location id or None, database alias) for this request.
+        """
+        code = request.query_params.get('location')
+        if not code and hasattr(request.data, 'get'):
+            code = request.data.get('location')
+        return resolve_location(code)
+
+    def filter_location(self, rooms):
+        """
+        Narrow a Room queryset to the requested location, or to rooms without a
+        location when none was requested.
+        """
+        return rooms.filter(location_id=self.location_id)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.location_id, alias = self.get_location(request, *args, **kwargs)
+        self._shard_token = activate_shard(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_shard_token', None)
+        if token is not None:
+            reset_shard(token)
+            self._shard_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class RetireOnDestroyMixin:
+    """
+    Mixin for destroy views of rooms, timeslots, teams and users: DELETE retires the
+    object instead of cascading through its bookings. The object disappears from the
+    API at once; purge_retired deletes it and its bookings later, in small batches.
+    Upcoming bookings of users and teams are cancelled at once so they free their rooms.
+    """
+
+    def perform_destroy(self, instance):
+        instance.retire()
+        cancel_retired_bookings(instance)
+
+# Utility for conflict check
+def has_booking_conflict(room, date, start_time, end_time):
     """
-    Calculate the number of team members aged 10 or older.
+    Check if there is an active booking conflict for the given room, date, and interval,
+    reading the room-day occupancy store instead of scanning bookings.
 
     Args:
-        team: Team instance.
+        room: Room instance to check.
+        date: Date of the booking.
+        start_time: Start of the requested interval.
+        end_time: End of the requested interval (exclusive).
 
     Returns:
-        int: Count of team members aged 10 or older.
+        bool: True if a conflict exists, False otherwise.
     """
-    count = 0
-    for member in team.members.all():
-        if member.age >= 10:
-            count += 1
-    return count
+    return peak_load(load_counts([room.id], [date])[(room.id, date)], start_time, end_time) > 0
 
-class BookingCreateView(APIView):
+class BookingCreateView(LocationShardMixin, APIView):
     """
     API view to create a new booking for rooms including conference, shared, and private types.
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [BookingWriteThrottle]
 
-    @transaction.atomic
+    @limit_concurrent_writes
+    @shard_atomic
+    @idempotent
     def post(self, request):
         """
         Handle POST request to create a booking with validation for room type and user/team eligibility.
@@ -93,23 +185,23 @@ class BookingCreateView(APIView):
         Returns:
             Response: Booking ID on success or error message on failure.
         """
-        serializer = BookingSerializer(data=request.data)
+        serializer = BookingSerializer(data=request.data, context={'location_id': self.location_id})
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
 
 
         # Lock the room row to prevent race conditions
-        room_name = request.data.get("room")
-        room = Room.objects.select_for_update().get(name=room_name)
+        room = Room.objects.active().select_for_update().filter(pk=data['room'].pk).first()
         data['room'] = room  
 
         date = data['date']
-        time_slot = data['time_slot']
+        start_time = data['start_time']
+        end_time = data['end_time']
         user = request.user
         team = data['team'] if 'team' in data else None
 
         
-        if not time_slot:
+        if not start_time or not end_time:
             return Response({"error": "Missing time_slot in request data."}, status=400)
         
         if not room:
@@ -125,34 +217,26 @@ class BookingCreateView(APIView):
                 return Response({"error": "Team must have at least 3 members (age >= 10)."}, status=400)
             if user != team.created_by: # Only team lead can book conference rooms
                 return Response({"error": "Only team lead can book conference rooms."}, status=403)
-            if has_booking_conflict(room, date, time_slot):
+            if has_booking_conflict(room, date, start_time, end_time):
                 return Response({"error": "Room is already booked for the selected date and time slot."}, status=400)
             else:
                 booking = serializer.save(team=team)
 
         elif room.room_type == 'shared':
-            # Check if user already has an active booking for any shared room at the same date and time_slot
-            existing_booking = Booking.objects.filter(
+            # Check if user already has an active booking for any shared room overlapping the interval
+            existing_booking = overlapping_bookings(date, start_time, end_time).filter(
                 user=user,
-                room__room_type='shared',
-                date=date,
-                time_slot=time_slot,
-                is_active=True
+                room__room_type='shared'
             ).exists()
             if existing_booking:
                 return Response({"error": "User has already booked a shared room for the selected date and time slot."}, status=400)
 
-            # Find a shared desk room with availability
-            shared_rooms = Room.objects.filter(room_type='shared')
+            # Find a shared desk room with availability, reading every shared room's occupancy at once
+            shared_rooms = list(self.filter_location(Room.objects.active().filter(room_type='shared')))
+            occupancy = load_counts([shared_room.id for shared_room in shared_rooms], [date])
             assigned_room = None
             for shared_room in shared_rooms:
-                booking_count = Booking.objects.filter(
-                    room=shared_room,
-                    date=date,
-                    time_slot=time_slot,
-                    is_active=True
-                ).count()
-                if booking_count < 4:
+                if peak_load(occupancy[(shared_room.id, date)], start_time, end_time) < SHARED_DESK_SEATS:
                     assigned_room = shared_room
                     break
             if not assigned_room:
@@ -161,20 +245,36 @@ class BookingCreateView(APIView):
             booking = serializer.save(user=user, room=assigned_room)
 
         elif room.room_type == 'private':
-            if has_booking_conflict(room, date, time_slot):
+            if has_booking_conflict(room, date, start_time, end_time):
                 return Response({"error": "Room is already booked for the selected date and time slot."}, status=400)
             else:
                 booking = serializer.save(user=user)
 
+        apply_booking(booking, 1)
+        record_event('booking_created', booking, actor=user)
         return Response({"booking_id": booking.id}, status=201)
 
-class BookingCancelView(APIView):
+class BookingCancelView(LocationShardMixin, APIView):
     """
     API view to cancel an existing active booking.
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [BookingWriteThrottle]
 
-    @transaction.atomic
+    def get_location(self, request, *args, **kwargs):
+        """
+        Use the requested location's shard, or find the shard holding the booking.
+        """
+        if request.query_params.get('location'):
+            return super().get_location(request, *args, **kwargs)
+        for alias in shard_databases():
+            if Booking.objects.using(alias).filter(id=kwargs['booking_id']).exists():
+                return None, alias
+        return None, DEFAULT_DB_ALIAS
+
+    @limit_concurrent_writes
+    @shard_atomic
+    @idempotent
     def post(self, request, booking_id):
         """
         Handle POST request to cancel a booking if the user is authorized.
@@ -199,9 +299,165 @@ class BookingCancelView(APIView):
 
         booking.is_active = False
         booking.save()
+        apply_booking(booking, -1)
+        record_event('booking_cancelled', booking, actor=request.user)
+        promote_waitlist(booking)
         return Response({"success": "Booking cancelled."})
 
-class BookingListView(generics.ListAPIView):
+class BookingExportView(LocationShardMixin, APIView):
+    """
+    API view to export active bookings of a user, team or room as an iCalendar feed.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, ICalendarRenderer]
+
+    EXPORT_CHUNK = 500
+
+    def get(self, request):
+        """
+        Handle GET request to stream bookings as text/calendar.
+
+        The calendar is generated while it is sent: bookings are read with iterator()
+        in chunks, and each chunk's users and teams are resolved with one query each.
+
+        Query Parameters:
+            user (int): Bookings of this user. Defaults to the caller.
+            team (int): Bookings of this team (members and admins).
+            room (int): Bookings of this room (admins only).
+            start_date (str): Optional first date to include.
+            end_date (str): Optional last date to include.
+
+        Returns:
+            StreamingHttpResponse: The calendar, or an error message.
+        """
+        params = request.query_params
+        user = request.user
+        is_admin = user.role == 'admin'
+        try:
+            start_date = parse_date(params['start_date']) if params.get('start_date') else None
+            end_date = parse_date(params['end_date']) if params.get('end_date') else None
+            team_id = int(params['team']) if params.get('team') else None
+            room_id = int(params['room']) if params.get('room') else None
+            user_id = int(params['user']) if params.get('user') else None
+        except ValueError:
+            return Response({"error": "Dates must be in YYYY-MM-DD format; user, team and room must be integers."}, status=400)
+        if (params.get('start_date') and not start_date) or (params.get('end_date') and not end_date):
+            return Response({"error": "Dates must be in YYYY-MM-DD format."}, status=400)
+
+        # Bind the shard now: the response body is produced after this view returns
+        bookings = Booking.objects.using(current_shard()).filter(is_active=True)
+        if team_id is not None:
+            if not is_admin and not is_team_member(user, team_id):
+                return Response({"error": "You are not a member of this team."}, status=403)
+            team = Team.objects.filter(pk=team_id).first()
+            if team is None:
+                return Response({"error": "Team not found."}, status=404)
+            bookings, name = bookings.filter(team_id=team_id), f"Team {team.name}"
+        elif room_id is not None:
+            if not is_admin:
+                return Response({"error": "Only admins can export room calendars."}, status=403)
+            room = self.filter_location(Room.objects.filter(pk=room_id)).first()
+            if room is None:
+                return Response({"error": "Room not found."}, status=404)
+            bookings, name = bookings.filter(room_id=room_id), room.name
+        else:
+            if user_id is not None and user_id != user.pk and not is_admin:
+                return Response({"error": "You can only export your own bookings."}, status=403)
+            owner = user if user_id in (None, user.pk) else User.objects.filter(pk=user_id).first()
+            if owner is None:
+                return Response({"error": "User not found."}, status=404)
+            bookings, name = bookings.filter(user_id=owner.pk), owner.name
+        if self.location_id is not None:
+            bookings = bookings.filter(room__location_id=self.location_id)
+        if start_date:
+            bookings = bookings.filter(date__gte=start_date)
+        if end_date:
+            bookings = bookings.filter(date__lte=end_date)
+        bookings = bookings.select_related('room').only(
+            'id', 'date', 'start_time', 'end_time', 'timestamp', 'user_id', 'team_id', 'room__name'
+        ).order_by('date', 'start_time')
+
+        response = StreamingHttpResponse(
+            calendar_stream(self.events(bookings), name), content_type='text/calendar; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="bookings.ics"'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Only the calendar itself is text/calendar; error responses are always JSON
+        if isinstance(response, Response):
+            request.accepted_renderer, request.accepted_media_type = JSONRenderer(), JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def events(self, bookings):
+        rows = bookings.iterator(chunk_size=self.EXPORT_CHUNK)
+        while chunk := list(islice(rows, self.EXPORT_CHUNK)):
+            user_ids = {booking.user_id for booking in chunk if booking.user_id}
+            team_ids = {booking.team_id for booking in chunk if booking.team_id}
+            users = {
+                pk: (name, email)
+                for pk, name, email in User.objects.filter(pk__in=user_ids).values_list('pk', 'name', 'email')
+            } if user_ids else {}
+            teams = dict(Team.objects.filter(pk__in=team_ids).values_list('pk', 'name')) if team_ids else {}
+            for booking in chunk:
+                yield booking_event(booking, booking.room.name, teams.get(booking.team_id), users.get(booking.user_id))
+
+class BookingCheckView(LocationShardMixin, APIView):
+    """
+    API view to check a cart of (room, date, time slot) selections for availability in one request.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Handle POST request to report whether each selection in a cart is free or taken.
+
+        Rooms are resolved with one query, time slots from the cached catalog and
+        occupancy for every room-day in the cart with one more.
+
+        Returns:
+            Response: One result per item, in request order, or an error message.
+        """
+        serializer = BookingCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['items']
+
+        names = {item['room'] for item in items}
+        # Shared desk bookings are placed on any shared room of the location, so fetch those too
+        candidates = list(self.filter_location(
+            Room.objects.active().filter(models.Q(name__in=names) | models.Q(room_type='shared'))
+        ))
+        rooms = {room.name: room for room in candidates if room.name in names}
+        shared_rooms = [room for room in candidates if room.room_type == 'shared']
+        slots = {slot['name']: slot for slot in timeslot_catalog()}
+
+        occupancy = load_counts([room.id for room in candidates], {item['date'] for item in items})
+
+        results = []
+        for item in items:
+            result = {"room": item['room'], "date": item['date'], "time_slot": item['time_slot']}
+            room, slot = rooms.get(item['room']), slots.get(item['time_slot'])
+            if room is None or slot is None:
+                result["status"] = "invalid"
+                result["error"] = (
+                    f'Room with name "{item["room"]}" does not exist.' if room is None
+                    else f'Timeslot with name "{item["time_slot"]}" does not exist.'
+                )
+            elif room.room_type == 'shared':
+                remaining = sum(
+                    max(SHARED_DESK_SEATS - peak_load(occupancy[(shared_room.id, item['date'])], slot['start_time'], slot['end_time']), 0)
+                    for shared_room in shared_rooms
+                )
+                result["status"] = "free" if remaining else "taken"
+                result["remaining"] = remaining
+            else:
+                taken = peak_load(occupancy[(room.id, item['date'])], slot['start_time'], slot['end_time']) > 0
+                result["status"] = "taken" if taken else "free"
+            results.append(result)
+
+        return Response({"count": len(results), "results": results})
+
+class BookingListView(ReplicaReadMixin, LocationShardMixin, generics.ListAPIView):
     """
     API view to list active bookings for the authenticated user or all bookings for admin users.
     """
@@ -217,12 +473,200 @@ class BookingListView(generics.ListAPIView):
         """
         user = self.request.user
         if user.role == 'admin':
-            return Booking.objects.filter(is_active=True)
+            bookings = Booking.objects.filter(is_active=True)
         else:
             #return Booking.objects.filter(user=user, is_active=True)
-            return Booking.objects.filter(models.Q(user=user) | models.Q(team__members=user), is_active=True).distinct()
+            # UNION of two index-backed id lookups (own bookings, bookings of the user's cached
+            # team ids) instead of an OR across the membership join plus DISTINCT
+            own = Booking.objects.filter(user=user, is_active=True).values('id')
+            of_teams = Booking.objects.filter(team_id__in=user_team_ids(user), is_active=True).values('id')
+            bookings = Booking.objects.filter(id__in=own.union(of_teams))
+        if self.location_id is not None:
+            bookings = bookings.filter(room__location_id=self.location_id)
+        return bookings.select_related('room').prefetch_related(
+            'user', 'team', models.Prefetch('team__members', queryset=User.objects.only('id'))
+        ).order_by('-date', '-start_time', 'id')
+
+class BookingScheduleView(ReplicaReadMixin, LocationShardMixin, APIView):
+    """
+    API view to return a date-by-timeslot grid of the caller's own and team bookings.
+    """
+    permission_classes = [IsAuthenticated]
+
+    DEFAULT_DAYS = 7
+    MAX_DAYS = 31
+
+    def get(self, request):
+        """
+        Handle GET request to build the caller's schedule for a date range.
+
+        Query Parameters:
+            start_date (str): First date of the grid. Defaults to today.
+            end_date (str): Last date of the grid (inclusive). Defaults to a week from start_date.
+
+        Returns:
+            Response: The timeslot catalog and, per date, the bookings in each timeslot.
+        """
+        params = request.query_params
+        try:
+            start_date = parse_date(params['start_date']) if params.get('start_date') else dt_date.today()
+            end_date = (
+                parse_date(params['end_date']) if params.get('end_date')
+                else start_date and start_date + timedelta(days=self.DEFAULT_DAYS - 1)
+            )
+        except ValueError:
+            start_date = end_date = None
+        if not start_date or not end_date:
+            return Response({"error": "Dates must be in YYYY-MM-DD format."}, status=400)
+        if end_date < start_date:
+            return Response({"error": "end_date must not be before start_date."}, status=400)
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            return Response({"error": f"Date range cannot exceed {self.MAX_DAYS} days."}, status=400)
+
+        user = request.user
+        team_ids = user_team_ids(user)
+        # One query over the (user|team, is_active, date) indexes, flat values only
+        bookings = Booking.objects.filter(
+            models.Q(user=user) | models.Q(team_id__in=team_ids),
+            is_active=True, date__range=(start_date, end_date),
+        )
+        if self.location_id is not None:
+            bookings = bookings.filter(room__location_id=self.location_id)
+        bookings = list(bookings.order_by('date', 'start_time').values(
+            'id', 'date', 'time_slot_id', 'start_time', 'end_time', 'room_id', 'room__name', 'team_id',
+        ))
+
+        catalog = timeslot_catalog()
+        booked_team_ids = {booking['team_id'] for booking in bookings if booking['team_id']}
+        team_names = dict(Team.objects.filter(id__in=booked_team_ids).values_list('id', 'name')) if booked_team_ids else {}
+
+        days = {
+            (start_date + timedelta(days=offset)).isoformat(): {}
+            for offset in range((end_date - start_date).days + 1)
+        }
+        for booking in bookings:
+            entry = {
+                "id": booking['id'],
+                "room": {"id": booking['room_id'], "name": booking['room__name']},
+                "team": {"id": booking['team_id'], "name": team_names.get(booking['team_id'])} if booking['team_id'] else None,
+            }
+            if booking['time_slot_id']:
+                cells = [str(booking['time_slot_id'])]
+            else:
+                # Custom intervals show up in every catalog slot they overlap
+                entry["start_time"], entry["end_time"] = booking['start_time'], booking['end_time']
+                cells = [
+                    str(slot['id']) for slot in catalog
+                    if slot['start_time'] < booking['end_time'] and booking['start_time'] < slot['end_time']
+                ] or [f"{booking['start_time']:%H:%M} - {booking['end_time']:%H:%M}"]
+            day = days[booking['date'].isoformat()]
+            for cell in cells:
+                day.setdefault(cell, []).append(entry)
+
+        return Response({
+            "start_date": start_date,
+            "end_date": end_date,
+            "time_slots": [{"id": slot['id'], "name": slot['name']} for slot in catalog],
+            "days": days,
+        })
+
+class WaitlistListCreateView(LocationShardMixin, generics.ListCreateAPIView):
+    """
+    API view to list the caller's waitlist entries or join the waitlist for a taken slot.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = WaitlistEntrySerializer
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'location_id': self.location_id}
+
+    def get_queryset(self):
+        """
+        Get the waitlist entries of the user and of the user's teams.
+
+        Returns:
+            QuerySet: Waitlist entries ordered by date and arrival.
+        """
+        user = self.request.user
+        entries = WaitlistEntry.objects.filter(models.Q(user=user) | models.Q(team_id__in=user_team_ids(user)))
+        if self.location_id is not None:
+            entries = entries.filter(location_id=self.location_id)
+        return entries.select_related('room').order_by('date', 'id')
+
+    @shard_atomic
+    def post(self, request):
+        """
+        Handle POST request to join the waitlist for a room (or any shared desk) and time slot.
+
+        Returns:
+            Response: The waitlist entry and its queue position, or an error message.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        room = data['room']
+        time_slot = data['time_slot']
+        date = data['date']
+        user = request.user
+        team = data.get('team')
+
+        if date < dt_date.today():
+            return Response({"error": "Cannot join the waitlist for a past date."}, status=400)
+
+        # Same eligibility rules as booking
+        if team and room.room_type != 'conference':
+            return Response({"error": "Team can only book conference rooms."}, status=400)
+        if room.room_type == 'conference':
+            if not team:
+                return Response({"error": "Team required for conference room."}, status=400)
+            if team_seat_count(team) < 3:
+                return Response({"error": "Team must have at least 3 members (age >= 10)."}, status=400)
+            if user != team.created_by:
+                return Response({"error": "Only team lead can book conference rooms."}, status=403)
+
+        if room.room_type == 'shared':
+            # Any shared room of the entry's location can seat the waiter, as in promote_waitlist()
+            shared_rooms = list(Room.objects.active().filter(
+                room_type='shared', location_id=room.location_id
+            ).values_list('id', flat=True))
+            occupancy = load_counts(shared_rooms, [date])
+            if any(peak_load(occupancy[(room_id, date)], time_slot.start_time, time_slot.end_time) < SHARED_DESK_SEATS
+                   for room_id in shared_rooms):
+                return Response({"error": "A shared desk is available for the selected slot; book it instead."}, status=400)
+        elif not has_booking_conflict(room, date, time_slot.start_time, time_slot.end_time):
+            return Response({"error": "Room is available for the selected slot; book it instead."}, status=400)
+
+        queue = waitlist_queue(room).filter(date=date, time_slot=time_slot)
+        waiter = {"team": team} if team else {"user": user}
+        if queue.filter(**waiter).exists():
+            return Response({"error": "Already on the waitlist for this slot."}, status=400)
+
+        entry = serializer.save(
+            room=None if room.room_type == 'shared' else room,
+            room_type=room.room_type,
+            location_id=room.location_id,
+            user=None if team else user,
+            team=team,
+        )
+        return Response(
+            {**serializer.data, "position": queue.filter(id__lte=entry.id).count()},
+            status=201,
+        )
+
+class WaitlistEntryDestroyView(LocationShardMixin, generics.DestroyAPIView):
+    """
+    API view to leave the waitlist. Users can remove their own entries, team leads their team's.
+    """
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id'
 
-class AvailableRoomsAndSlotsByDateView(APIView):
+    def get_queryset(self):
+        user = self.request.user
+        # Teams live in the global database, so resolve the led team ids there first
+        led_team_ids = list(user.created_teams.values_list('id', flat=True))
+        return WaitlistEntry.objects.filter(models.Q(user=user) | models.Q(team_id__in=led_team_ids))
+
+class AvailableRoomsAndSlotsByDateView(ReplicaReadMixin, LocationShardMixin, APIView):
     """
     API view to list available rooms and their available time slots for a given date and optional room type.
     """
@@ -244,52 +688,47 @@ class AvailableRoomsAndSlotsByDateView(APIView):
 
         if not date:
             date = dt_date.today()
+        else:
+            try:
+                date = parse_date(date)
+            except ValueError:
+                date = None
+            if not date:
+                return Response({"error": "date must be in YYYY-MM-DD format."}, status=400)
 
         if room_type:
-            rooms = Room.objects.filter(room_type=room_type)
+            rooms = Room.objects.active().filter(room_type=room_type)
         else:
-            rooms = Room.objects.all()
+            rooms = Room.objects.active()
+        rooms = self.filter_location(rooms)
 
         paginator = PageNumberPagination()
         paginated_rooms = paginator.paginate_queryset(rooms, request)
 
-        all_time_slots = Timeslot.objects.all()
+        all_time_slots = timeslot_catalog()
+        opens = min((slot['start_time'] for slot in all_time_slots), default=None)
+        closes = max((slot['end_time'] for slot in all_time_slots), default=None)
+
+        # Occupancy for every room on this page, from the host's shared memory table when it holds them
+        occupancy = load_counts_shared([room.id for room in paginated_rooms], [date])
 
         result = []
 
         for room in paginated_rooms:
-            available_slots = []
-            for time_slot in all_time_slots:
-                if room.room_type == 'shared':
-                    booking_count = Booking.objects.filter(
-                        room=room,
-                        date=date,
-                        time_slot=time_slot,
-                        is_active=True
-                    ).count()
-                    if booking_count < 4:
-                        available_slots.append({
-                            "id": time_slot.id,
-                            "name": time_slot.name,
-                            "start_time": time_slot.start_time,
-                            "end_time": time_slot.end_time
-                        })
-                else:
-                    is_booked = Booking.objects.filter(
-                        room=room,
-                        date=date,
-                        time_slot=time_slot,
-                        is_active=True
-                    ).exists()
-                    if not is_booked:
-                        available_slots.append({
-                            "id": time_slot.id,
-                            "name": time_slot.name,
-                            "start_time": time_slot.start_time,
-                            "end_time": time_slot.end_time
-                        })
-
-            if available_slots:
+            seats = SHARED_DESK_SEATS if room.room_type == 'shared' else 1
+            available_slots = [
+                {
+                    "id": time_slot['id'],
+                    "name": time_slot['name'],
+                    "start_time": time_slot['start_time'],
+                    "end_time": time_slot['end_time']
+                }
+                for time_slot in all_time_slots
+                if peak_load(occupancy[(room.id, date)], time_slot['start_time'], time_slot['end_time']) < seats
+            ]
+            free = free_intervals_from_counts(occupancy[(room.id, date)], opens, closes, seats) if all_time_slots else []
+
+            if available_slots or free:
                 result.append({
                     "room": {
                         "id": room.id,
@@ -297,15 +736,147 @@ class AvailableRoomsAndSlotsByDateView(APIView):
                         "room_type": room.room_type,
                         "capacity": room.capacity,
                     },
-                    "available_slots": available_slots
+                    "available_slots": available_slots,
+                    "free_intervals": [
+                        {"start_time": free_start, "end_time": free_end} for free_start, free_end in free
+                    ]
                 })
             else:
                 return Response({"message": "No available rooms or slots for the selected date."}, status=404)
 
         return paginator.get_paginated_response(result)
 
+class FreeSlotSearchView(ReplicaReadMixin, LocationShardMixin, APIView):
+    """
+    API view to find free (room, date, time slot) candidates across a date range in a single query.
+    """
+    permission_classes = [IsAuthenticated]
+
+    MAX_DAYS = 14
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        """
+        Handle GET request to search free slots matching capacity, room type, date range and time window.
+
+        Query Parameters:
+            capacity (int): Minimum room capacity. Defaults to 1.
+            room_type (str): Optional room type filter.
+            start_date (str): First date to search. Defaults to today.
+            end_date (str): Last date to search (inclusive). Defaults to start_date.
+            start_time (str): Optional earliest slot start, e.g. "09:00".
+            end_time (str): Optional latest slot end, e.g. "12:00".
+            order (str): "earliest" (default) or "best_fit".
+            limit (int): Maximum number of candidates to return.
+
+        Returns:
+            Response: Ranked list of free candidates or an error message.
+        """
+        params = request.query_params
+        try:
+            capacity = int(params.get('capacity', 1))
+            limit = min(int(params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "capacity and limit must be integers."}, status=400)
+        if capacity < 1 or limit < 1:
+            return Response({"error": "capacity and limit must be positive."}, status=400)
+
+        try:
+            start_date = parse_date(params['start_date']) if params.get('start_date') else dt_date.today()
+            end_date = parse_date(params['end_date']) if params.get('end_date') else start_date
+        except ValueError:
+            start_date = end_date = None
+        if not start_date or not end_date:
+            return Response({"error": "Dates must be in YYYY-MM-DD format."}, status=400)
+        if end_date < start_date:
+            return Response({"error": "end_date must not be before start_date."}, status=400)
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            return Response({"error": f"Date range cannot exceed {self.MAX_DAYS} days."}, status=400)
+
+        try:
+            start_time = parse_time(params['start_time']) if params.get('start_time') else None
+            end_time = parse_time(params['end_time']) if params.get('end_time') else None
+        except ValueError:
+            start_time = end_time = False
+        if (params.get('start_time') and not start_time) or (params.get('end_time') and not end_time):
+            return Response({"error": "Times must be in HH:MM format."}, status=400)
+
+        order = params.get('order', 'earliest')
+        if order not in ('earliest', 'best_fit'):
+            return Response({"error": "order must be 'earliest' or 'best_fit'."}, status=400)
+
+        rooms = self.filter_location(Room.objects.active().filter(capacity__gte=capacity))
+        if params.get('room_type'):
+            rooms = rooms.filter(room_type=params['room_type'])
+        rooms = list(rooms.order_by('capacity', 'id'))
+
+        time_slots = Timeslot.objects.active()
+        if start_time:
+            time_slots = time_slots.filter(start_time__gte=start_time)
+        if end_time:
+            time_slots = time_slots.filter(end_time__lte=end_time)
+        time_slots = list(time_slots.order_by('start_time'))
+
+        if not rooms or not time_slots:
+            return Response({"count": 0, "results": []})
+
+        # Past dates and slots of today that have already ended cannot be booked any more
+        now = datetime.now()
+        dates = [
+            day for day in (start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1))
+            if day >= now.date()
+        ]
+        if not dates:
+            return Response({"count": 0, "results": []})
+
+        # One occupancy query covering every room-day inside the search window
+        occupancy = load_counts([room.id for room in rooms], dates)
+
+        if order == 'earliest':
+            candidates = (
+                (room, day, slot)
+                for day in dates for slot in time_slots for room in rooms
+            )
+        else:
+            # Smallest sufficient rooms first, then earliest slot among rooms of equal size
+            room_groups = [list(group) for _, group in groupby(rooms, key=lambda room: room.capacity)]
+            candidates = (
+                (room, day, slot)
+                for group in room_groups for day in dates for slot in time_slots for room in group
+            )
+
+        result = []
+        for room, day, slot in candidates:
+            if day == now.date() and slot.end_time <= now.time():
+                continue
+            seats = SHARED_DESK_SEATS if room.room_type == 'shared' else 1
+            remaining = seats - peak_load(occupancy[(room.id, day)], slot.start_time, slot.end_time)
+            if remaining <= 0:
+                continue
+            result.append({
+                "room": {
+                    "id": room.id,
+                    "name": room.name,
+                    "room_type": room.room_type,
+                    "capacity": room.capacity,
+                },
+                "date": day,
+                "time_slot": {
+                    "id": slot.id,
+                    "name": slot.name,
+                    "start_time": slot.start_time,
+                    "end_time": slot.end_time
+                },
+                "remaining": remaining,
+            })
+            if len(result) >= limit:
+                break
+
+        return Response({"count": len(result), "results": result})
+
 # Team CRUD views
-class TeamListCreateView(generics.ListCreateAPIView):
+class TeamListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     API view to list and create teams. Admins see all teams; users see teams they created or belong to.
     """
@@ -321,9 +892,11 @@ class TeamListCreateView(generics.ListCreateAPIView):
         """
         user = self.request.user
         if user.role == 'admin':
-            return Team.objects.all()
-        # Users can see teams they created or are members of
-        return Team.objects.filter(models.Q(created_by=user) | models.Q(members=user)).distinct()
+            teams = Team.objects.active()
+        else:
+            # Users can see teams they created or are members of (cached team ids, no membership join)
+            teams = Team.objects.active().filter(models.Q(created_by=user) | models.Q(id__in=user_team_ids(user)))
+        return teams.prefetch_related(models.Prefetch('members', queryset=User.objects.only('id'))).order_by('id')
         #return Team.objects.all()
     def perform_create(self, serializer):
         """
@@ -331,9 +904,9 @@ class TeamListCreateView(generics.ListCreateAPIView):
         """
         serializer.save(created_by=self.request.user)
 
-class TeamRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class TeamRetrieveUpdateDestroyView(RetireOnDestroyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    API view to retrieve, update, or delete a team. Admins can access all; users only their own teams.
+    API view to retrieve, update, or retire a team. Admins can access all; users only their own teams.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = TeamSerializer
@@ -348,9 +921,9 @@ class TeamRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         """
         user = self.request.user
         if user.role == 'admin':
-            return Team.objects.all()
+            return Team.objects.active()
         # Users can only update/delete teams they created
-        return Team.objects.filter(created_by=user)
+        return Team.objects.active().filter(created_by=user)
 
 # API for user to join a team
 class JoinTeamView(APIView):
@@ -371,15 +944,14 @@ class JoinTeamView(APIView):
         """
         user = request.user
         try:
-            team = Team.objects.get(id=team_id)
+            team = Team.objects.active().get(id=team_id)
         except Team.DoesNotExist:
             return Response({"error": "Team not found."}, status=404)
 
-        if user in team.members.all():
+        if team.members.filter(pk=user.pk).exists():
             return Response({"message": "User already a member of the team."}, status=200)
 
         team.members.add(user)
-        team.save()
         return Response({"message": "User added to the team."}, status=200)
 
 # API for admin to add any user to any team
@@ -405,24 +977,78 @@ class AdminAddUserToTeamView(APIView):
             return Response({"error": "team_id and user_id are required."}, status=400)
 
         try:
-            team = Team.objects.get(id=team_id)
+            team = Team.objects.active().get(id=team_id)
         except Team.DoesNotExist:
             return Response({"error": "Team not found."}, status=404)
 
         try:
-            user = User.objects.get(id=user_id)
+            user = User.objects.active().get(id=user_id)
         except User.DoesNotExist:
             return Response({"error": "User not found."}, status=404)
 
-        if user in team.members.all():
+        if team.members.filter(pk=user.pk).exists():
             return Response({"message": "User already a member of the team."}, status=200)
 
         team.members.add(user)
-        team.save()
         return Response({"message": "User added to the team by admin."}, status=200)
 
+# API for bulk team membership changes
+class TeamMembersBulkUpdateView(APIView):
+    """
+    API view for a team lead or admin to add and remove many team members at once.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request, team_id):
+        """
+        Handle POST request to add and/or remove team members in bulk.
+
+        Expects 'add' and/or 'remove' lists of user ids in request data. All ids are
+        validated with one query and memberships are written in bulk.
+
+        Args:
+            team_id (int): ID of the team to update.
+
+        Returns:
+            Response: Number of members added and removed or error message.
+        """
+        try:
+            team = Team.objects.active().get(id=team_id)
+        except Team.DoesNotExist:
+            return Response({"error": "Team not found."}, status=404)
+
+        if request.user.role != 'admin' and team.created_by_id != request.user.id:
+            return Response({"error": "Only team lead or admin can manage team members."}, status=403)
+
+        serializer = TeamMembersUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add_ids = serializer.validated_data['add']
+        remove_ids = serializer.validated_data['remove']
+
+        Membership = Team.members.through
+        removed = 0
+        if remove_ids:
+            removed, _ = Membership.objects.filter(team_id=team.id, user_id__in=remove_ids).delete()
+
+        added = 0
+        if add_ids:
+            current_ids = set(
+                Membership.objects.filter(team_id=team.id, user_id__in=add_ids).values_list('user_id', flat=True)
+            )
+            new_memberships = [
+                Membership(team_id=team.id, user_id=user_id) for user_id in add_ids - current_ids
+            ]
+            Membership.objects.bulk_create(new_memberships, batch_size=500, ignore_conflicts=True)
+            added = len(new_memberships)
+
+        # bulk_create and queryset deletes bypass m2m_changed, so invalidate explicitly
+        invalidate_user_team_ids(add_ids | remove_ids)
+
+        return Response({"added": added, "removed": removed}, status=200)
+
 # Admin CRUD views for User
-class UserListCreateView(generics.ListCreateAPIView):
+class UserListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     API view to list and create users. Admins only.
     """
@@ -431,16 +1057,16 @@ class UserListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all users.
+        Get queryset of active users.
 
         Returns:
-            QuerySet: All users.
+            QuerySet: Users that are not retired.
         """
-        return User.objects.all()
+        return User.objects.active()
 
-class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class UserRetrieveUpdateDestroyView(RetireOnDestroyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    API view to retrieve, update, or delete a user. Admins only.
+    API view to retrieve, update, or retire a user. Admins only.
     """
     permission_classes = [IsAuthenticated, IsAdmin]
     serializer_class = UserSerializer
@@ -448,15 +1074,15 @@ class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all users.
+        Get queryset of active users.
 
         Returns:
-            QuerySet: All users.
+            QuerySet: Users that are not retired.
         """
-        return User.objects.all()
+        return User.objects.active()
 
 # Admin CRUD views for Room
-class RoomListCreateView(generics.ListCreateAPIView):
+class RoomListCreateView(ReplicaReadMixin, LocationShardMixin, generics.ListCreateAPIView):
     """
     API view to list and create rooms. Admins only.
     """
@@ -465,16 +1091,16 @@ class RoomListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all rooms.
+        Get queryset of active rooms.
 
         Returns:
-            QuerySet: All rooms.
+            QuerySet: Rooms of the requested location that are not retired.
         """
-        return Room.objects.all()
+        return self.filter_location(Room.objects.active())
 
-class RoomRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class RoomRetrieveUpdateDestroyView(RetireOnDestroyMixin, LocationShardMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    API view to retrieve, update, or delete a room. Admins only.
+    API view to retrieve, update, or retire a room. Admins only.
     """
     permission_classes = [IsAuthenticated, IsAdmin]
     serializer_class = RoomSerializer
@@ -482,15 +1108,97 @@ class RoomRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all rooms.
+        Get queryset of active rooms.
 
         Returns:
-            QuerySet: All rooms.
+            QuerySet: Rooms that are not retired.
         """
-        return Room.objects.all()
+        return Room.objects.active()
+
+# Admin CRUD views for Location
+class LocationListCreateView(generics.ListCreateAPIView):
+    """
+    API view to list and create locations. Admins only.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    serializer_class = LocationSerializer
+
+    def get_queryset(self):
+        """
+        Get queryset of all locations.
+
+        Returns:
+            QuerySet: All locations.
+        """
+        return Location.objects.order_by('name')
+
+# Admin cross-shard booking list
+class AdminBookingListView(APIView):
+    """
+    API view listing active bookings across every location shard, newest date first. Admins only.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        """
+        Handle GET request to list bookings from all shards as one paginated result.
+
+        Each shard returns at most the rows up to the requested page, already sorted,
+        and the per-shard lists are merged.
+
+        Query Parameters:
+            page (int): Page number. Defaults to 1.
+            date (str): Optional date filter.
+
+        Returns:
+            Response: Paginated list of bookings.
+        """
+        paginator = PageNumberPagination()
+        page_size = paginator.get_page_size(request)
+        try:
+            page = int(request.query_params.get('page', 1))
+        except ValueError:
+            page = 0
+        if page < 1:
+            return Response({"error": "page must be a positive integer."}, status=400)
+
+        queryset = Booking.objects.filter(is_active=True).order_by('-date', '-timestamp')
+        if request.query_params.get('date'):
+            try:
+                date = parse_date(request.query_params['date'])
+            except ValueError:
+                date = None
+            if not date:
+                return Response({"error": "date must be in YYYY-MM-DD format."}, status=400)
+            queryset = queryset.filter(date=date)
+
+        window = page * page_size
+        count = 0
+        per_shard = []
+        for alias in shard_databases():
+            count += queryset.using(alias).count()
+            per_shard.append(list(queryset.using(alias)[:window]))
+        merged = merge(*per_shard, key=lambda booking: (booking.date, booking.timestamp), reverse=True)
+        results = list(islice(merged, window - page_size, window))
+
+        url = request.build_absolute_uri()
+        next_url = replace_query_param(url, 'page', page + 1) if window < count else None
+        if page == 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+
+        return Response({
+            "count": count,
+            "next": next_url,
+            "previous": previous_url,
+            "results": BookingListSerializer(results, many=True).data,
+        })
 
 # Admin CRUD views for Timeslot
-class TimeslotListCreateView(generics.ListCreateAPIView):
+class TimeslotListCreateView(ReplicaReadMixin, generics.ListCreateAPIView):
     """
     API view to list and create timeslots. Admins only.
     """
@@ -499,16 +1207,16 @@ class TimeslotListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all timeslots.
+        Get queryset of active timeslots.
 
         Returns:
-            QuerySet: All timeslots.
+            QuerySet: Timeslots that are not retired.
         """
-        return Timeslot.objects.all()
+        return Timeslot.objects.active()
 
-class TimeslotRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class TimeslotRetrieveUpdateDestroyView(RetireOnDestroyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
-    API view to retrieve, update, or delete a timeslot. Admins only.
+    API view to retrieve, update, or retire a timeslot. Admins only.
     """
     permission_classes = [IsAuthenticated, IsAdmin]
     serializer_class = TimeslotSerializer
@@ -516,11 +1224,75 @@ class TimeslotRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """
-        Get queryset of all timeslots.
+        Get queryset of active timeslots.
+
+        Returns:
+            QuerySet: Timeslots that are not retired.
+        """
+        return Timeslot.objects.active()
+
+class AdmissionMetricsView(APIView):
+    """
+    API view exposing admitted and rejected booking write counters for this process. Admins only.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        """
+        Handle GET request to return the current admission control counters.
+
+        Returns:
+            Response: Counts of admitted writes and writes rejected by rate limit or concurrency limit.
+        """
+        return Response(admission_metrics.snapshot())
+
+class AuditMetricsView(APIView):
+    """
+    API view exposing the audit log writer counters for this process. Admins only.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        """
+        Handle GET request to return the current audit log writer counters.
 
         Returns:
-            QuerySet: All timeslots.
+            Response: Counts of queued, written, inline-written and failed audit events.
+        """
+        return Response(audit_log.snapshot())
+
+class AuditEventListView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    API view listing booking audit history, newest first, by booking, user or room. Admins only.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    serializer_class = AuditEventSerializer
+
+    def get_queryset(self):
         """
-        return Timeslot.objects.all()
+        Get audit events matching the query parameters.
+
+        Query Parameters:
+            booking (uuid): Events of one booking.
+            user (int): Events of bookings owned by, or changes made by, one user.
+            room (int): Events of one room; combine with `location` for rooms in a location.
+            location (str): Location code of the room.
 
+        Returns:
+            QuerySet: Matching audit events.
+        """
+        params = self.request.query_params
+        events = AuditEvent.objects.all()
+        try:
+            if params.get('booking'):
+                events = events.filter(booking_id=uuid.UUID(params['booking']))
+            if params.get('user'):
+                user_id = int(params['user'])
+                events = events.filter(models.Q(user_id=user_id) | models.Q(actor_id=user_id))
+            if params.get('room'):
+                location_id, _ = resolve_location(params.get('location'))
+                events = events.filter(room_id=int(params['room']), location_id=location_id)
+        except ValueError:
+            raise ValidationError({"error": "booking must be a UUID; user and room must be integers."})
+        return events.order_by('-created_at', '-id')
 
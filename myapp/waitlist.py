@@ -0,0 +1,90 @@
+from .audit import record_event
+from .membership import team_seat_count
+from .models import SHARED_DESK_SEATS, Booking, Room, Team, User, WaitlistEntry
+from .occupancy import apply_booking, load_counts, overlapping_bookings, peak_load
+from .timeslots import timeslot_catalog
+
+# Waitlist entries inspected per freed time slot when looking for an eligible waiter
+WAITLIST_PROMOTION_SCAN = 20
+
+
+def waitlist_queue(room):
+    """
+    Get the waitlist entries competing for the given room: its own queue, or the queue
+    of every shared room in its location for shared desks.
+    """
+    if room.room_type == 'shared':
+        return WaitlistEntry.objects.filter(room_type='shared', location_id=room.location_id)
+    return WaitlistEntry.objects.filter(room=room)
+
+
+def promote_waitlist(booking):
+    """
+    Promote the first eligible waiter into each time slot freed by a cancelled booking.
+
+    Must run inside the cancellation transaction, after apply_booking(booking, -1).
+    At most WAITLIST_PROMOTION_SCAN entries per slot are read, in arrival order, through
+    the waitlist queue indexes. Waiters that are no longer eligible keep their place.
+
+    Args:
+        booking: The booking that was just cancelled.
+
+    Returns:
+        list: Bookings created for promoted waiters.
+    """
+    room = booking.room
+    if room.is_retired:
+        return []
+    freed_slots = [
+        slot for slot in timeslot_catalog()
+        if slot['start_time'] < booking.end_time and booking.start_time < slot['end_time']
+    ]
+    if not freed_slots:
+        return []
+
+    if room.room_type == 'shared':
+        seats = SHARED_DESK_SEATS
+        rooms = list(Room.objects.active().select_for_update().filter(
+            room_type='shared', location_id=room.location_id
+        ).order_by('id'))
+    else:
+        seats = 1
+        rooms = [Room.objects.select_for_update().get(pk=room.pk)]
+    queue = waitlist_queue(room).filter(date=booking.date)
+
+    promoted = []
+    for slot in freed_slots:
+        waiters = list(queue.filter(time_slot_id=slot['id']).order_by('id')[:WAITLIST_PROMOTION_SCAN])
+        if not waiters:
+            continue
+        occupancy = load_counts([candidate.id for candidate in rooms], [booking.date])
+        free_room = next((
+            candidate for candidate in rooms
+            if peak_load(occupancy[(candidate.id, booking.date)], slot['start_time'], slot['end_time']) < seats
+        ), None)
+        if free_room is None:
+            continue
+
+        for entry in waiters:
+            if entry.team_id:
+                team = Team.objects.active().filter(pk=entry.team_id).first()
+                if team is None or team_seat_count(team) < 3:
+                    continue
+            elif not User.objects.active().filter(pk=entry.user_id).exists():
+                continue
+            elif room.room_type == 'shared' and overlapping_bookings(
+                booking.date, slot['start_time'], slot['end_time']
+            ).filter(user_id=entry.user_id, room__room_type='shared').exists():
+                continue
+
+            new_booking = Booking.objects.create(
+                room=free_room, date=booking.date, time_slot_id=slot['id'],
+                start_time=slot['start_time'], end_time=slot['end_time'],
+                user_id=entry.user_id, team_id=entry.team_id,
+            )
+            apply_booking(new_booking, 1)
+            record_event('booking_promoted', new_booking, waitlist_entry=entry.id, cancelled_booking=str(booking.id))
+            entry.delete()
+            promoted.append(new_booking)
+            break
+    return promoted